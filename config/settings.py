@@ -5,6 +5,20 @@ class Settings(BaseSettings):
     BOT_WEBHOOK_URL: str | None
 
     BOT_TOKEN: str
+    UPDATE_CONCURRENCY: int = 64
+    UPDATE_MAX_PENDING: int = 1000
+    UPDATE_ADMIT_TIMEOUT: float = 5
+    UPDATE_MAX_PENDING_PER_CHAT: int = 20
+    BOT_DRAIN_TIMEOUT: float = 20
+    BOT_WORKERS: int = 1
+    BOT_START_TIMEOUT: float = 30
+    BOT_SOCKET_DIR: str = '/tmp/bot_workers'
+    BOT_METRICS_DIR: str = '/tmp/bot_metrics'
+    BOT_METRICS_PUSHGATEWAY: str | None = None
+    OUTBOUND_RATE: float = 30
+    OUTBOUND_CHAT_RATE: float = 1
+    OUTBOUND_CHAT_BURST: int = 3
+    OUTBOUND_MAX_RETRIES: int = 3
 
     DB_HOST: str
     DB_PORT: int
@@ -16,11 +30,53 @@ class Settings(BaseSettings):
     RABBIT_PORT: int
     RABBIT_USER: str
     RABBIT_PASSWORD: str
+    RABBIT_MANAGEMENT_PORT: int = 15672
 
     REDIS_HOST: str
     REDIS_PORT: str
 
-    USER_TASK_QUEUE_TEMPLATE: str = 'user_tasks.{user_id}'
+    RPC_REPLY_QUEUE_PREFIX: str = 'bot_replies'
+    RPC_TIMEOUT: float = 5
+    TASK_EVENTS_EXCHANGE: str = 'task_events'
+    CATALOG_CACHE_TTL: int = 600
+    CONSUMER_CONCURRENCY: int = 10
+    CONSUMER_ORDER_BY: str = 'user_id'
+    CONSUMER_PROCESSES: int = 1
+    CONSUMER_DRAIN_TIMEOUT: float = 10
+    CONSUMER_START_TIMEOUT: float = 30
+    CONSUMER_METRICS_DIR: str = '/tmp/consumer_metrics'
+    CATALOG_CACHE_LOCAL_SIZE: int = 256
+    CATALOG_PAGE_SIZE: int = 4
+
+    SANDBOX_USER: str = 'limiteduser'
+    SANDBOX_DIR: str = '/env/restricted_dir'
+    SANDBOX_TIMEOUT: float = 3
+    SANDBOX_BATCH_MODE: bool = True
+    SANDBOX_OUTPUT_LIMIT: int = 64 * 1024
+    SANDBOX_MEMORY_LIMIT_MB: int = 256
+    SANDBOX_FILE_SIZE_LIMIT_KB: int = 1024
+    SANDBOX_MAX_PROCESSES: int = 0
+    SANDBOX_POOL_SIZE: int = 0
+    SANDBOX_POOL_MAX_JOBS: int = 200
+    SANDBOX_POOL_MAX_RSS_MB: int = 256
+    SANDBOX_POOL_ACQUIRE_TIMEOUT: float = 5
+    SANDBOX_POOL_MAX_SPAWN_FAILURES: int = 5
+    SANDBOX_SUPERVISOR_SOCKET: str | None = None
+    SANDBOX_SUPERVISOR_GROUP: str | None = None
+    GRADING_CONCURRENCY: int = 0
+    GRADING_SHARDS: int = 1
+    GRADING_MIN_SHARD_SIZE: int = 4
+    GRADING_CACHE_ENABLED: bool = True
+    GRADING_CACHE_TTL: int = 24 * 3600
+    GRADING_CACHE_LOCAL_SIZE: int = 1024
+    GRADING_SUITE_CACHE_SIZE: int = 512
+    GRADING_SUITE_CACHE_TTL: float = 3600
+
+    GRADER_ENABLED: bool = False
+    GRADER_CONCURRENCY: int = 4
+    GRADER_DRAIN_TIMEOUT: float = 30
+    GRADING_JOBS_QUEUE: str = 'grading_jobs'
+    GRADING_RESULTS_QUEUE: str = 'grading_results'
 
     @property
     def db_url(self) -> str:
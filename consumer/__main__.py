@@ -1,4 +1,13 @@
 import uvicorn
 
+from config.settings import settings
+from consumer.supervisor import Supervisor
+
+PORT = 8010
+
 if __name__ == '__main__':
-    uvicorn.run('consumer.web_app:create_app', factory=True, host='0.0.0.0', port=8010, workers=1)
+    if settings.CONSUMER_PROCESSES > 1:
+        # The supervisor only serves the aggregated metrics, its processes consume the queue.
+        Supervisor().run(PORT)
+    else:
+        uvicorn.run('consumer.web_app:create_app', factory=True, host='0.0.0.0', port=PORT, workers=1)
@@ -2,6 +2,8 @@ from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from starlette.requests import Request
 from starlette.responses import Response
 
+from consumer.metrics_init import registry
+
 from .router import router
 
 
@@ -9,4 +11,4 @@ from .router import router
 async def metrics(
     request: Request,
 ) -> Response:
-    return Response(generate_latest(), headers={'Content-Type': CONTENT_TYPE_LATEST})
+    return Response(generate_latest(registry), headers={'Content-Type': CONTENT_TYPE_LATEST})
@@ -1,32 +1,95 @@
+import asyncio
 import logging.config
+import time
+from functools import partial
 
 import msgpack
+from aio_pika.abc import AbstractIncomingMessage, AbstractQueue
 
+from config.settings import settings
+from consumer.blobs import blobs
 from consumer.handlers.task import handle_task
 from consumer.logger import LOGGING_CONFIG, correlation_id_ctx, logger
-from consumer.metrics_init import REQUESTS
-from consumer.schema.task import TaskMessage
+from consumer.metrics_init import CONSUMER_QUEUE_LAG, REQUESTS
+from consumer.schema.task import TaskEventMessage, TaskMessage
+from consumer.workers import WorkerPool
 from db.storage import rabbit
+from src.processes import drain_tasks
 
 
-async def start_consumer() -> None:
-    logging.config.dictConfig(LOGGING_CONFIG)
-    logger.info('Starting consumer...')
+async def process(message: AbstractIncomingMessage, body: TaskMessage) -> None:
+    # Acknowledged once the handler is done, a failed message is rejected and one cut short by shutdown requeued.
+    try:
+        correlation_id_ctx.set(message.correlation_id)
+        if body['event'] == 'tasks':
+            logging.info(body['event'])
+            logging.info(body['action'])
+            await handle_task(body, message.reply_to)
+    except asyncio.CancelledError:
+        await message.reject(requeue=True)
+        raise
+    except Exception:
+        await message.reject()
+        raise
+    await message.ack()
+
+
+class Consumer:
+    def __init__(self, concurrency: int = settings.CONSUMER_CONCURRENCY) -> None:
+        self.concurrency = concurrency
+        self.workers = WorkerPool(concurrency)
+        self.receiving: asyncio.Task[None] | None = None
+        self.started = asyncio.Event()
 
-    queue_name = 'user_messages'
+    async def run(self) -> None:
+        logging.config.dictConfig(LOGGING_CONFIG)
+        logger.info('Starting consumer...')
 
-    async with rabbit.channel_pool.acquire() as channel:
+        queue_name = 'user_messages'
 
-        await channel.set_qos(prefetch_count=10)
+        async with rabbit.channel_pool.acquire() as channel:
 
-        queue = await channel.declare_queue(queue_name, durable=True)
+            await channel.set_qos(prefetch_count=self.concurrency)
+
+            queue = await channel.declare_queue(queue_name, durable=True)
+            self.receiving = asyncio.create_task(self.receive(queue))
+            self.started.set()
+            try:
+                await asyncio.wait((self.receiving,))
+            finally:
+                self.receiving.cancel()
+        await self.workers.join()
+
+    async def receive(self, queue: AbstractQueue) -> None:
         async with queue.iterator() as queue_iter:
             async for message in queue_iter:
                 REQUESTS.inc()
-                async with message.process():
-                    correlation_id_ctx.set(message.correlation_id)
+                if (published_at := (message.headers or {}).get('published_at')) is not None:
+                    CONSUMER_QUEUE_LAG.observe(max(time.time() - published_at, 0))
+                try:
                     body: TaskMessage = msgpack.unpackb(message.body)
-                    if body['event'] == 'tasks':
-                        logging.info(body['event'])
-                        logging.info(body['action'])
-                        await handle_task(body)
+                except ValueError:
+                    logger.exception('Dropping a malformed message')
+                    await message.reject()
+                    continue
+                # Messages with the same key, e.g. from one user, are handled in the order they arrived.
+                key = body.get(settings.CONSUMER_ORDER_BY) if settings.CONSUMER_ORDER_BY else None
+                await self.workers.submit(key, partial(process, message, body))
+
+    async def drain(self, timeout: float = settings.CONSUMER_DRAIN_TIMEOUT) -> None:
+        if self.receiving is not None:
+            # Stop taking messages, the prefetched ones that were not started go back to the queue.
+            self.receiving.cancel()
+        if self.workers.tasks:
+            logger.info('Waiting for %s messages to be processed...', len(self.workers.tasks))
+            _, pending = await drain_tasks(self.workers.tasks, timeout)
+            if pending:
+                logger.warning('%s messages were cancelled on shutdown and requeued', len(pending))
+
+
+async def start_consumer() -> None:
+    await Consumer().run()
+
+
+async def handle_task_event(event: TaskEventMessage) -> None:
+    blobs.forget(event['complexity'], event['task_id'])
@@ -0,0 +1,50 @@
+from collections import defaultdict
+from typing import Awaitable, Callable, Hashable
+
+import msgpack
+
+from consumer.utils import task_detail
+from db.model.task import Task
+
+
+class CatalogBlobs:
+    def __init__(self) -> None:
+        # Packed get_task_page replies by complexity and then by cursor, direction and page size.
+        self.pages: defaultdict[str, dict[Hashable, bytes]] = defaultdict(dict)
+        self.tasks: dict[str, bytes] = {}
+        # Bumped when a complexity changes so that a page loaded before that is not stored.
+        self.generations: defaultdict[str, int] = defaultdict(int)
+
+    def cached_page(self, complexity: str, key: Hashable) -> bytes | None:
+        return pages.get(key) if (pages := self.pages.get(complexity)) is not None else None
+
+    async def page(self, complexity: str, key: Hashable, load: Callable[[], Awaitable[bytes]]) -> bytes:
+        if (blob := self.cached_page(complexity, key)) is not None:
+            return blob
+        generation = self.generations[complexity]
+        blob = await load()
+        if generation == self.generations[complexity]:
+            self.pages[complexity][key] = blob
+        return blob
+
+    async def task(self, task_id: str, load: Callable[[], Awaitable[dict | None]]) -> bytes:
+        if (blob := self.tasks.get(task_id)) is not None:
+            return blob
+        detail = await load()
+        blob = msgpack.packb({'task': detail})
+        if detail is not None:
+            self.tasks[task_id] = blob
+        return blob
+
+    def add(self, task: Task) -> None:
+        # A new task may land on any page of its complexity, those are loaded again on demand.
+        self.forget(task.complexity, str(task.id))
+        self.tasks[str(task.id)] = msgpack.packb({'task': task_detail(task)})
+
+    def forget(self, complexity: str, task_id: str) -> None:
+        self.generations[complexity] += 1
+        self.pages.pop(complexity, None)
+        self.tasks.pop(task_id, None)
+
+
+blobs = CatalogBlobs()
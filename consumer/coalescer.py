@@ -0,0 +1,5 @@
+from consumer.metrics_init import COALESCED_QUERIES
+from src.cache import Coalescer
+
+# Identical catalog queries that arrive while one is running share its result instead of hitting the database.
+coalescer: Coalescer[bytes] = Coalescer(COALESCED_QUERIES, 'fetched')
@@ -1,42 +1,36 @@
+from functools import partial
+from uuid import UUID
+
 import aio_pika
 import msgpack
-from aio_pika import ExchangeType
 from sqlalchemy import select
+from sqlalchemy.orm import undefer_group
 
 from config.settings import settings
-from consumer.logger import correlation_id_ctx
-from consumer.schema.task import CreateTaskMessage, GetTaskByIdMessage, TaskMessage
-from consumer.utils import task_to_dict
+from consumer.blobs import blobs
+from consumer.coalescer import coalescer
+from consumer.logger import correlation_id_ctx, logger
+from consumer.schema.task import (
+    CreateTaskMessage,
+    GetTaskByIdMessage,
+    GetTaskPageMessage,
+    TaskEventMessage,
+    TaskMessage,
+)
+from consumer.utils import task_detail, task_to_dict
 from db.model.task import Task
 from db.storage import rabbit
 from db.storage.db import async_session
 
 
-async def handle_task(message: TaskMessage | CreateTaskMessage | GetTaskByIdMessage):
-    if message['action'].startswith('get_tasks_by_complexity'):
-        complexity = message['action'].split(':')[1]
-        async with async_session() as db:
-            not_fetched = await db.execute(select(Task).where(Task.complexity == complexity))
-            tasks = not_fetched.scalars().all()
-
-            tasks_as_dicts = [await task_to_dict(task) for task in tasks]
-
-            async with rabbit.channel_pool.acquire() as channel:  # type: aio_pika.Channel
-                exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
-
-                await exchange.publish(
-                    aio_pika.Message(
-                        msgpack.packb(
-                            {
-                                'tasks': tasks_as_dicts,
-                            }
-                        ),
-                        correlation_id=correlation_id_ctx.get(),
-                    ),
-                    routing_key=settings.USER_TASK_QUEUE_TEMPLATE.format(user_id=message['user_id']),
-                )
+async def handle_task(
+    message: TaskMessage | CreateTaskMessage | GetTaskByIdMessage | GetTaskPageMessage, reply_to: str | None = None
+):
+    if reply_to is None and message['action'] != 'create_task':
+        logger.warning('Request %s has no reply_to, dropping it', message['action'])
+        return
 
-    elif message['action'] == 'create_task':
+    if message['action'] == 'create_task':
         task = Task(
             title=message['title'],
             description=message['description'],
@@ -45,25 +39,89 @@ async def handle_task(message: TaskMessage | CreateTaskMessage | GetTaskByIdMess
             secret_input=list(message['secret_input']),
             correct_answer=list(message['correct_answer']),
             secret_answer=list(message['secret_answer']),
+            time_limit=message.get('time_limit'),
+            memory_limit_mb=message.get('memory_limit_mb'),
         )
         async with async_session() as db:
             db.add(task)
             await db.commit()
-    elif message['action'] == 'get_task_by_id':
-        async with async_session() as db:
-            taskq = await db.scalar(select(Task).where(Task.id == message['task_id']))
-        task = await task_to_dict(taskq)
-        async with rabbit.channel_pool.acquire() as channel:  # type: aio_pika.Channel
-            exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
+        blobs.add(task)
 
-            await exchange.publish(
-                aio_pika.Message(
-                    msgpack.packb(
-                        {
-                            'task': task,
-                        }
-                    ),
-                    correlation_id=correlation_id_ctx.get(),
+        await rabbit.publisher.publish(
+            aio_pika.Message(
+                msgpack.packb(
+                    TaskEventMessage(
+                        task_id=str(task.id),
+                        complexity=task.complexity,
+                        event='task_events',
+                        action='created',
+                    )
                 ),
-                routing_key=settings.USER_TASK_QUEUE_TEMPLATE.format(user_id=message['user_id']),
-            )
+                correlation_id=correlation_id_ctx.get(),
+            ),
+            routing_key='',
+            exchange=settings.TASK_EVENTS_EXCHANGE,
+        )
+    elif message['action'] == 'get_task_by_id':
+        task_id = message['task_id']
+        body = blobs.tasks.get(task_id) or await coalescer.run(
+            f'get_task_by_id:{task_id}', partial(blobs.task, task_id, partial(fetch_task, task_id))
+        )
+        await reply(body, reply_to)
+    elif message['action'] == 'get_task_tests':
+        body = await coalescer.run(
+            f"get_task_tests:{message['task_id']}", partial(fetch_task_tests, message['task_id'])
+        )
+        await reply(body, reply_to)
+    elif message['action'] == 'get_task_page':
+        complexity, cursor, direction = message['complexity'], message['cursor'], message['direction']
+        limit = message['limit']
+        key = (cursor, direction, limit)
+        body = blobs.cached_page(complexity, key) or await coalescer.run(
+            f'get_task_page:{complexity}:{direction}:{cursor}:{limit}',
+            partial(blobs.page, complexity, key, partial(fetch_task_page, complexity, cursor, direction, limit)),
+        )
+        await reply(body, reply_to)
+
+
+async def fetch_task(task_id: str) -> dict | None:
+    async with async_session() as db:
+        taskq = await db.scalar(select(Task).where(Task.id == task_id))
+    return None if taskq is None else task_detail(taskq)
+
+
+async def fetch_task_tests(task_id: str) -> bytes:
+    async with async_session() as db:
+        taskq = await db.scalar(select(Task).where(Task.id == task_id).options(undefer_group('tests')))
+    return msgpack.packb({'task': None if taskq is None else task_to_dict(taskq)})
+
+
+async def fetch_task_page(complexity: str, cursor: str | None, direction: str, limit: int) -> bytes:
+    query = select(Task.id, Task.title).where(Task.complexity == complexity)
+    backwards = direction == 'prev' and cursor is not None
+    if backwards:
+        query = query.where(Task.id < UUID(cursor)).order_by(Task.id.desc())
+    elif cursor is not None:
+        query = query.where(Task.id > UUID(cursor)).order_by(Task.id)
+    else:
+        query = query.order_by(Task.id)
+
+    async with async_session() as db:
+        # The extra row tells whether there is anything past this page.
+        rows = (await db.execute(query.limit(limit + 1))).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+        page = {'has_next': True, 'has_prev': more}
+    else:
+        page = {'has_next': more, 'has_prev': cursor is not None}
+    page['items'] = [{'id': str(task_id), 'title': title} for task_id, title in rows]
+    return msgpack.packb({'page': page})
+
+
+async def reply(body: bytes, reply_to: str) -> None:
+    await rabbit.publisher.publish(
+        aio_pika.Message(body, correlation_id=correlation_id_ctx.get()),
+        routing_key=reply_to,
+    )
@@ -1,7 +1,7 @@
 import time
 from functools import wraps
 
-from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
 
 registry = CollectorRegistry()
 
@@ -12,6 +12,23 @@ REQUESTS = Counter('requests_total', 'Total number of requests', registry=regist
 
 DB_FETCH_REQUESTS = Counter('db_fetch_requests_total', 'Total number of requests at db', registry=registry)
 DB_FETCH_PROCESSING_TIME = Histogram('db_fetch_processing_time', 'Request processing time (s)', registry=registry)
+# Coalescing ratio: rate(consumer_catalog_queries_total{result="coalesced"}) / rate(consumer_catalog_queries_total)
+COALESCED_QUERIES = Counter(
+    'consumer_catalog_queries_total',
+    'Catalog queries, fetched or joined to a pending one',
+    ['result'],
+    registry=registry,
+)
+CONSUMER_IN_FLIGHT = Gauge(
+    'consumer_messages_in_flight',
+    'Messages being handled or waiting for an earlier one with the same key',
+    multiprocess_mode='livesum',
+    registry=registry,
+)
+# Measured from the publisher's clock, only for messages that carry a published_at header.
+CONSUMER_QUEUE_LAG = Histogram(
+    'consumer_queue_lag_seconds', 'Time between publishing a message and taking it from the queue', registry=registry
+)
 
 
 def measure_time(func):
@@ -0,0 +1,18 @@
+from .base import BaseMessage
+
+
+class GradeTaskMessage(BaseMessage):
+    user_id: int
+    chat_id: int
+    task_id: str
+    code: str
+    action: str
+
+
+class GradingResultMessage(BaseMessage):
+    user_id: int
+    chat_id: int
+    task_id: str
+    complexity: str | None
+    result: str
+    action: str
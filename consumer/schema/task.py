@@ -1,3 +1,5 @@
+from typing import NotRequired
+
 from .base import BaseMessage
 
 
@@ -15,6 +17,8 @@ class CreateTaskMessage(BaseMessage):
     correct_answer: list
     secret_input: list
     secret_answer: list
+    time_limit: NotRequired[float | None]
+    memory_limit_mb: NotRequired[int | None]
     action: str
 
 
@@ -22,3 +26,19 @@ class GetTaskByIdMessage(BaseMessage):
     task_id: str
     user_id: int
     action: str
+
+
+class GetTaskPageMessage(BaseMessage):
+    user_id: int
+    complexity: str
+    # Id of the last task shown for 'next', of the first one for 'prev', None for the first page.
+    cursor: str | None
+    direction: str
+    limit: int
+    action: str
+
+
+class TaskEventMessage(BaseMessage):
+    task_id: str
+    complexity: str
+    action: str
@@ -0,0 +1,110 @@
+import asyncio
+import logging.config
+import os
+import signal
+import time
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from multiprocessing.synchronize import Event
+from typing import Callable
+
+from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+from config.settings import settings
+from consumer.app import Consumer, handle_task_event
+from consumer.logger import LOGGING_CONFIG, logger
+from db.storage.rabbit import consume_task_events
+from src.processes import ProcessSupervisor
+
+
+def run_worker(ready: Event) -> None:
+    asyncio.run(serve(ready))
+
+
+async def serve(ready: Event) -> None:
+    logging.config.dictConfig(LOGGING_CONFIG)
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+
+    consumer = Consumer()
+    task = asyncio.create_task(consumer.run())
+    task_events_consumer = asyncio.create_task(consume_task_events(handle_task_event))
+    stop = asyncio.create_task(stopping.wait())
+    started = asyncio.create_task(consumer.started.wait())
+    await asyncio.wait((task, started), return_when=asyncio.FIRST_COMPLETED)
+    if task.done():
+        task_events_consumer.cancel()
+        task.result()
+        return
+    ready.set()
+
+    await asyncio.wait((task, stop), return_when=asyncio.FIRST_COMPLETED)
+    logger.info('Consumer process %s is draining', os.getpid())
+    await consumer.drain()
+    await task
+    task_events_consumer.cancel()
+
+
+class Supervisor(ProcessSupervisor):
+    def __init__(
+        self,
+        processes: int = settings.CONSUMER_PROCESSES,
+        drain_timeout: float = settings.CONSUMER_DRAIN_TIMEOUT,
+        metrics_dir: str = settings.CONSUMER_METRICS_DIR,
+        target: Callable[[Event], None] = run_worker,
+    ) -> None:
+        super().__init__(
+            target, 'Consumer process', logger, metrics_dir, settings.CONSUMER_START_TIMEOUT, drain_timeout
+        )
+        self.processes = processes
+        self.children: list[BaseProcess] = []
+        self.stopping = False
+        self.restarting = False
+
+    def run(self, port: int) -> None:
+        logging.config.dictConfig(LOGGING_CONFIG)
+        self.setup_metrics()
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=self.metrics_dir)
+        start_http_server(port, registry=registry)
+
+        signal.signal(signal.SIGTERM, self.on_stop)
+        signal.signal(signal.SIGINT, self.on_stop)
+        signal.signal(signal.SIGHUP, self.on_restart)
+
+        logger.info('Starting %s consumer processes...', self.processes)
+        self.children = [self.spawn() for _ in range(self.processes)]
+        while not self.stopping:
+            if self.restarting:
+                self.restarting = False
+                self.restart()
+            wait([child.sentinel for child in self.children], timeout=1)
+            for index, child in enumerate(self.children):
+                if not child.is_alive() and not self.stopping:
+                    logger.warning('Consumer process %s exited with %s, replacing it', child.pid, child.exitcode)
+                    self.reap(child)
+                    time.sleep(1)
+                    self.children[index] = self.spawn()
+
+        logger.info('Draining %s consumer processes...', len(self.children))
+        for child in self.children:
+            child.terminate()
+        for child in self.children:
+            self.stop(child)
+
+    def on_stop(self, signum: int, frame) -> None:
+        self.stopping = True
+
+    def on_restart(self, signum: int, frame) -> None:
+        self.restarting = True
+
+    def restart(self) -> None:
+        # One process at a time, its replacement is consuming before it is stopped.
+        logger.info('Restarting consumer processes one by one...')
+        for index, child in enumerate(self.children):
+            if self.stopping:
+                return
+            self.children[index] = self.spawn()
+            self.stop(child)
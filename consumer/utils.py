@@ -1,4 +1,21 @@
-async def task_to_dict(task):
+def task_summary(task) -> dict:
+    return {
+        'id': str(task.id),
+        'title': task.title,
+        'complexity': task.complexity,
+    }
+
+
+def task_detail(task) -> dict:
+    return {
+        **task_summary(task),
+        'description': task.description,
+        'time_limit': task.time_limit,
+        'memory_limit_mb': task.memory_limit_mb,
+    }
+
+
+def task_to_dict(task) -> dict:
     return {
         'id': str(task.id),
         'title': task.title,
@@ -8,4 +25,6 @@ async def task_to_dict(task):
         'secret_input': task.secret_input,
         'input_data': task.input_data,
         'secret_answer': task.secret_answer,
+        'time_limit': task.time_limit,
+        'memory_limit_mb': task.memory_limit_mb,
     }
@@ -6,8 +6,9 @@ from typing import AsyncGenerator
 from fastapi import FastAPI
 
 from consumer.api.tech.router import router as tech_router
-from consumer.app import start_consumer
+from consumer.app import Consumer, handle_task_event
 from consumer.logger import LOGGING_CONFIG, logger
+from db.storage.rabbit import consume_task_events
 
 
 @asynccontextmanager
@@ -15,10 +16,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logging.config.dictConfig(LOGGING_CONFIG)
 
     logger.info('Starting lifespan')
-    task = asyncio.create_task(start_consumer())
+    consumer = Consumer()
+    task = asyncio.create_task(consumer.run())
+    task_events_consumer = asyncio.create_task(consume_task_events(handle_task_event))
     logger.info('Started succesfully')
     yield
-    task.cancel()
+    await consumer.drain()
+    await task
+    task_events_consumer.cancel()
     logger.info('Ending lifespan')
 
 
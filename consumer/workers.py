@@ -0,0 +1,42 @@
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable, Hashable
+
+from config.settings import settings
+from consumer.logger import logger
+from consumer.metrics_init import CONSUMER_IN_FLIGHT
+
+
+class WorkerPool:
+    def __init__(self, concurrency: int = settings.CONSUMER_CONCURRENCY) -> None:
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tasks: set[asyncio.Task[None]] = set()
+        # The last submitted handler for every key, the next one with the same key starts after it.
+        self.tails: dict[Hashable, asyncio.Task[None]] = {}
+
+    async def submit(self, key: Hashable | None, handler: Callable[[], Awaitable[None]]) -> None:
+        await self.semaphore.acquire()
+        CONSUMER_IN_FLIGHT.inc()
+        previous = None if key is None else self.tails.get(key)
+        task = asyncio.create_task(self.run(handler, previous))
+        self.tasks.add(task)
+        task.add_done_callback(partial(self.done, key))
+        if key is not None:
+            self.tails[key] = task
+
+    async def run(self, handler: Callable[[], Awaitable[None]], previous: asyncio.Task[None] | None) -> None:
+        if previous is not None:
+            await asyncio.wait((previous,))
+        await handler()
+
+    def done(self, key: Hashable | None, task: asyncio.Task[None]) -> None:
+        self.tasks.discard(task)
+        self.semaphore.release()
+        CONSUMER_IN_FLIGHT.dec()
+        if key is not None and self.tails.get(key) is task:
+            del self.tails[key]
+        if not task.cancelled() and (e := task.exception()) is not None:
+            logger.error('Message was not processed', exc_info=e)
+
+    async def join(self) -> None:
+        await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -1,6 +1,7 @@
 from typing import List
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.types import JSON
 
@@ -9,11 +10,18 @@ from db.model.meta import Base
 
 class Task(Base):
     __tablename__ = 'task'
+    # Carousel pages are read by complexity in id order.
+    __table_args__ = (Index('ix_task_complexity_id', 'complexity', 'id'),)
+
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
     title: Mapped[str] = mapped_column()
     complexity: Mapped[str] = mapped_column()
     description: Mapped[str] = mapped_column()
-    input_data: Mapped[List] = mapped_column(JSON)
-    correct_answer: Mapped[List] = mapped_column(JSON)
-    secret_input: Mapped[List] = mapped_column(JSON)
-    secret_answer: Mapped[List] = mapped_column(JSON)
+    # Test data is only needed for grading, it is not loaded unless asked for with undefer_group('tests').
+    input_data: Mapped[List] = mapped_column(JSON, deferred=True, deferred_group='tests')
+    correct_answer: Mapped[List] = mapped_column(JSON, deferred=True, deferred_group='tests')
+    secret_input: Mapped[List] = mapped_column(JSON, deferred=True, deferred_group='tests')
+    secret_answer: Mapped[List] = mapped_column(JSON, deferred=True, deferred_group='tests')
+    # Per-task sandbox limits, the defaults from the settings apply when they are not set.
+    time_limit: Mapped[float | None] = mapped_column(nullable=True)
+    memory_limit_mb: Mapped[int | None] = mapped_column(nullable=True)
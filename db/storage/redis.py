@@ -2,7 +2,7 @@ from redis.asyncio import ConnectionPool, Redis
 
 from config.settings import settings
 
-redis: Redis
+redis: Redis | None = None
 
 
 def setup_redis() -> Redis:
@@ -15,6 +15,6 @@ def setup_redis() -> Redis:
     return redis
 
 
-def get_redis() -> Redis:
+def get_redis() -> Redis | None:
     global redis
     return redis
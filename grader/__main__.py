@@ -0,0 +1,4 @@
+import uvicorn
+
+if __name__ == '__main__':
+    uvicorn.run('grader.web_app:create_app', factory=True, host='0.0.0.0', port=8020, workers=1)
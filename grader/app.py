@@ -0,0 +1,86 @@
+import asyncio
+import logging.config
+import time
+
+import msgpack
+from aio_pika.abc import AbstractIncomingMessage, AbstractQueue
+
+from config.settings import settings
+from consumer.schema.grading import GradeTaskMessage
+from db.storage import rabbit
+from grader.handlers.grade import handle_grading
+from grader.logger import LOGGING_CONFIG, correlation_id_ctx, logger
+from grader.metrics_init import GRADING_DURATION, GRADING_IN_FLIGHT, GRADING_JOBS
+from src.processes import drain_tasks
+
+
+class Grader:
+    def __init__(self, concurrency: int = settings.GRADER_CONCURRENCY) -> None:
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.in_flight: set[asyncio.Task[None]] = set()
+        self.stopped = asyncio.Event()
+        self.started = asyncio.Event()
+        self.queue: AbstractQueue | None = None
+        self.consumer_tag: str | None = None
+
+    async def run(self) -> None:
+        logging.config.dictConfig(LOGGING_CONFIG)
+        logger.info('Starting grader with concurrency %s...', self.concurrency)
+
+        async with rabbit.channel_pool.acquire() as channel:
+            await channel.set_qos(prefetch_count=self.concurrency)
+            self.queue = await channel.declare_queue(settings.GRADING_JOBS_QUEUE, durable=True)
+            self.consumer_tag = await self.queue.consume(self.on_message)
+            self.started.set()
+            await self.stopped.wait()
+
+    async def on_message(self, message: AbstractIncomingMessage) -> None:
+        task = asyncio.current_task()
+        self.in_flight.add(task)
+        GRADING_IN_FLIGHT.inc()
+        try:
+            async with self.semaphore:
+                await self.process(message)
+        except asyncio.CancelledError:
+            # Only a job cut short by shutdown goes back to the queue, another grader takes it.
+            if not message.processed:
+                await message.reject(requeue=True)
+            raise
+        finally:
+            GRADING_IN_FLIGHT.dec()
+            self.in_flight.discard(task)
+
+    async def process(self, message: AbstractIncomingMessage) -> None:
+        correlation_id_ctx.set(message.correlation_id)
+        try:
+            body: GradeTaskMessage = msgpack.unpackb(message.body)
+        except ValueError:
+            GRADING_JOBS.labels(status='malformed').inc()
+            logger.exception('Dropping a malformed grading job')
+            await message.reject()
+            return
+
+        start_time = time.monotonic()
+        try:
+            await handle_grading(body)
+        except Exception:
+            # The same job would fail the same way again, requeueing it would loop forever.
+            GRADING_JOBS.labels(status='failed').inc()
+            logger.exception('Grading job was not processed')
+            await message.reject()
+            return
+        GRADING_DURATION.observe(time.monotonic() - start_time)
+        GRADING_JOBS.labels(status='done').inc()
+        await message.ack()
+
+    async def drain(self, timeout: float = settings.GRADER_DRAIN_TIMEOUT) -> None:
+        if self.started.is_set():
+            # Stop taking new jobs, unacknowledged prefetched ones go back to the queue for other graders.
+            await self.queue.cancel(self.consumer_tag)
+        if self.in_flight:
+            logger.info('Waiting for %s grading jobs to finish...', len(self.in_flight))
+            _, pending = await drain_tasks(self.in_flight, timeout)
+            if pending:
+                logger.warning('%s grading jobs were cancelled on shutdown and will be redelivered', len(pending))
+        self.stopped.set()
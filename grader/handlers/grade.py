@@ -0,0 +1,59 @@
+from functools import partial
+
+import aio_pika
+import msgpack
+from aio_pika import DeliveryMode
+from sqlalchemy import select
+from sqlalchemy.orm import undefer_group
+
+from config.settings import settings
+from consumer.schema.grading import GradeTaskMessage, GradingResultMessage
+from consumer.utils import task_to_dict
+from db.model.task import Task
+from db.storage import rabbit
+from db.storage.db import async_session
+from grader.logger import correlation_id_ctx, logger
+from src.grading.suite import suite_cache
+from src.utils import check_user_task_solution
+
+
+async def load_task(task_id: str) -> dict | None:
+    async with async_session() as db:
+        task = await db.scalar(select(Task).where(Task.id == task_id).options(undefer_group('tests')))
+    return None if task is None else task_to_dict(task)
+
+
+async def grade(message: GradeTaskMessage) -> tuple[str | None, str]:
+    suite = await suite_cache.get(message['task_id'], partial(load_task, message['task_id']))
+    if suite is None:
+        logger.error('Task %s for grading does not exist', message['task_id'])
+        return None, 'Задача не найдена. Выберите другую задачу.'
+
+    return suite.complexity, await check_user_task_solution(message['code'], suite, message['user_id'])
+
+
+async def handle_grading(message: GradeTaskMessage) -> None:
+    try:
+        complexity, result = await grade(message)
+    except Exception:
+        logger.exception('Failed to grade a submission for task %s', message['task_id'])
+        complexity, result = None, 'Технические шоколадки. Попробуйте позже!'
+
+    await rabbit.publisher.publish(
+        aio_pika.Message(
+            msgpack.packb(
+                GradingResultMessage(
+                    user_id=message['user_id'],
+                    chat_id=message['chat_id'],
+                    task_id=message['task_id'],
+                    complexity=complexity,
+                    result=result,
+                    event='grading',
+                    action='result',
+                )
+            ),
+            correlation_id=correlation_id_ctx.get(None),
+            delivery_mode=DeliveryMode.PERSISTENT,
+        ),
+        routing_key=settings.GRADING_RESULTS_QUEUE,
+    )
@@ -0,0 +1,5 @@
+import logging
+
+from consumer.logger import LOGGING_CONFIG, correlation_id_ctx  # noqa: F401
+
+logger = logging.getLogger('grader_logger')
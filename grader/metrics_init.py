@@ -0,0 +1,5 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+GRADING_JOBS = Counter('grading_jobs_total', 'Grading jobs taken from the queue', ['status'])
+GRADING_IN_FLIGHT = Gauge('grading_jobs_in_flight', 'Grading jobs currently being checked')
+GRADING_DURATION = Histogram('grading_job_duration_seconds', 'Time spent grading one submission')
@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
+from fastapi import FastAPI
+
+from db.storage.rabbit import consume_task_events
+from db.storage.redis import setup_redis
+from grader.api.tech.router import router as tech_router
+from grader.app import Grader
+from grader.logger import LOGGING_CONFIG, logger
+from src.grading.pool import close_pool, setup_pool
+from src.task_events import handle_task_event
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    logging.config.dictConfig(LOGGING_CONFIG)
+
+    logger.info('Starting lifespan')
+    setup_redis()
+    await setup_pool()
+    task_events_consumer = asyncio.create_task(consume_task_events(handle_task_event))
+    grader = Grader()
+    task = asyncio.create_task(grader.run())
+    logger.info('Started succesfully')
+    yield
+    await grader.drain()
+    await task
+    task_events_consumer.cancel()
+    await close_pool()
+    logger.info('Ending lifespan')
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(docs_url='/swagger', lifespan=lifespan)
+    app.include_router(tech_router, prefix='', tags=['tech'])
+    return app
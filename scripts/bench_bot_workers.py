@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+import orjson
+from aiogram import Bot, Dispatcher, F
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import SendMessage
+from aiogram.types import Message
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from starlette.requests import Request
+
+from src.ingress import Ingress
+from src.keyboards.user_kb import generate_carousel_keyboard
+from src.states.task_answer import TaskAnswerState
+
+PAGE = {
+    'items': [{'id': str(uuid4()), 'title': f'Task {i}', 'complexity': 'easy'} for i in range(4)],
+    'has_prev': True,
+    'has_next': True,
+}
+
+
+async def show_page(message: Message, state: FSMContext) -> SendMessage:
+    await state.set_state(TaskAnswerState.waiting_for_answer)
+    await state.update_data(page=PAGE)
+    keyboard = await generate_carousel_keyboard(PAGE, 'task')
+    text = '\n'.join(f"<b>{item['title']}</b> ({item['complexity']})" for item in PAGE['items'])
+    return SendMessage(chat_id=message.chat.id, text=text, reply_markup=keyboard, parse_mode='HTML')
+
+
+def create_app() -> FastAPI:
+    # Routing, FSM and formatting as in the bot, without Telegram, RabbitMQ or Redis behind it.
+    bot = Bot(token='42:BENCH')
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.message.register(show_page, F.text)
+    app = FastAPI()
+
+    @app.post('/tg/webhook')
+    async def webhook(request: Request) -> ORJSONResponse:
+        # Answers once the update is handled so that the ingress sees the throughput of the workers.
+        await dp.feed_webhook_update(bot, await request.json())
+        return ORJSONResponse({'status': 'ok'})
+
+    return app
+
+
+def make_update(update_id: int, user_id: int) -> bytes:
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'User'}
+    chat = {'id': user_id, 'type': 'private'}
+    message = {'message_id': update_id, 'date': 0, 'chat': chat, 'from': user, 'text': 'Задачи'}
+    return orjson.dumps({'update_id': update_id, 'message': message})
+
+
+async def bench_workers(workers: int, updates: list[bytes], concurrency: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        ingress = Ingress(
+            workers=workers,
+            app='scripts.bench_bot_workers:create_app',
+            socket_dir=os.path.join(directory, 'sockets'),
+            metrics_dir=os.path.join(directory, 'metrics'),
+        )
+        await ingress.start()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def forward(body: bytes) -> None:
+            async with semaphore:
+                response = await ingress.forward(body)
+                assert response.status_code == 200, response.body
+
+        await asyncio.gather(*(forward(body) for body in updates[:concurrency]))
+        start_time = time.perf_counter()
+        await asyncio.gather(*(forward(body) for body in updates))
+        seconds = time.perf_counter() - start_time
+        await ingress.close()
+    return len(updates) / seconds
+
+
+async def bench(updates_count: int = 5000, users: int = 500, concurrency: int = 64) -> None:
+    updates = [make_update(i, 10**6 + i % users) for i in range(updates_count)]
+    print(f'{updates_count} updates from {users} users, {concurrency} in flight, {os.cpu_count()} CPUs')
+    # Workers beyond the number of CPUs only share the cores, those rows show the cost of the extra processes.
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        rate = await bench_workers(workers, updates, concurrency)
+        baseline = baseline or rate
+        print(f'{workers:>3} workers: {rate:10.0f} updates/s, x{rate / baseline:.2f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(bench(*map(int, sys.argv[1:])))
@@ -0,0 +1,50 @@
+import asyncio
+import sys
+import time
+
+import aio_pika
+import msgpack
+from aio_pika import ExchangeType
+
+from db.storage.rabbit import channel_pool, publisher
+
+ROUTING_KEY = 'bench_publisher'
+
+
+async def declare_every_time() -> None:
+    async with channel_pool.acquire() as channel:
+        exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
+        await exchange.publish(make_message(), routing_key=ROUTING_KEY)
+
+
+def make_message() -> aio_pika.Message:
+    return aio_pika.Message(msgpack.packb({'event': 'bench', 'action': 'noop'}))
+
+
+async def measure(name: str, publish, count: int, concurrency: int) -> None:
+    async def worker(n: int) -> None:
+        for _ in range(n):
+            await publish()
+
+    calls = count // concurrency
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(calls) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    print(f'{name:>19}: {calls * concurrency / elapsed:10.0f} publishes/s')
+
+
+async def bench(count: int = 5000, concurrency: int = 10) -> None:
+    async with channel_pool.acquire() as channel:
+        exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
+        queue = await channel.declare_queue(ROUTING_KEY, auto_delete=True)
+        await queue.bind(exchange, ROUTING_KEY)
+
+    await measure('declare per publish', declare_every_time, count, concurrency)
+    await measure('publisher', lambda: publisher.publish(make_message(), ROUTING_KEY), count, concurrency)
+
+    async with channel_pool.acquire() as channel:
+        await channel.queue_delete(ROUTING_KEY)
+
+
+if __name__ == '__main__':
+    asyncio.run(bench(*map(int, sys.argv[1:])))
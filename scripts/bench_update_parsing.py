@@ -0,0 +1,92 @@
+import json
+import random
+import sys
+import timeit
+from uuid import uuid4
+
+import orjson
+from aiogram import Bot
+from aiogram.types import Update
+
+from src.api.tg.tg import update_type
+
+USED_UPDATE_TYPES = frozenset({'message', 'callback_query'})
+
+
+def user(user_id: int) -> dict:
+    return {'id': user_id, 'is_bot': False, 'first_name': 'Иван', 'username': f'user{user_id}', 'language_code': 'ru'}
+
+
+def chat(user_id: int) -> dict:
+    return {'id': user_id, 'first_name': 'Иван', 'username': f'user{user_id}', 'type': 'private'}
+
+
+def bot_message(user_id: int) -> dict:
+    keyboard = [[{'text': f'Задача {i}', 'callback_data': f'task:{uuid4()}'}] for i in range(4)]
+    return {
+        'message_id': random.randint(1, 10**6),
+        'from': {'id': 42, 'is_bot': True, 'first_name': 'Python bot', 'username': 'python_bot'},
+        'chat': chat(user_id),
+        'date': 1700000000,
+        'text': 'Выберите задачу:',
+        'reply_markup': {'inline_keyboard': keyboard},
+    }
+
+
+def make_update(update_id: int) -> dict:
+    user_id = random.randint(10**8, 10**9)
+    kind = random.choices(('message', 'callback_query', 'edited_message', 'my_chat_member'), (45, 40, 10, 5))[0]
+    if kind == 'callback_query':
+        event = {
+            'id': str(random.randint(10**17, 10**18)),
+            'from': user(user_id),
+            'message': bot_message(user_id),
+            'chat_instance': str(random.randint(10**17, 10**18)),
+            'data': f'task:{uuid4()}',
+        }
+    elif kind == 'my_chat_member':
+        member = {'user': {'id': 42, 'is_bot': True, 'first_name': 'Python bot'}, 'status': 'kicked', 'until_date': 0}
+        event = {
+            'chat': chat(user_id),
+            'from': user(user_id),
+            'date': 1700000000,
+            'old_chat_member': {**member, 'status': 'member'},
+            'new_chat_member': member,
+        }
+    else:
+        code = 'def solution(a, b):\n    return a + b\n' * random.randint(1, 5)
+        event = {'message_id': update_id, 'from': user(user_id), 'chat': chat(user_id), 'date': 1700000000}
+        event['text'] = code
+        if kind == 'edited_message':
+            event['edit_date'] = 1700000100
+    return {'update_id': update_id, kind: event}
+
+
+def stdlib(bot: Bot, body: bytes) -> Update:
+    # request.json() and then feed_webhook_update validating every update.
+    return Update.model_validate(json.loads(body), context={'bot': bot})
+
+
+def fast_path(bot: Bot, body: bytes) -> Update | None:
+    update = orjson.loads(body)
+    if update_type(update) not in USED_UPDATE_TYPES:
+        return None
+    return Update.model_validate(update, context={'bot': bot})
+
+
+def validate_json(bot: Bot, body: bytes) -> Update:
+    return Update.model_validate_json(body, context={'bot': bot})
+
+
+def bench(updates_count: int = 1000, number: int = 20) -> None:
+    bot = Bot(token='42:BENCH')
+    corpus = [orjson.dumps(make_update(i)) for i in range(updates_count)]
+    size = sum(map(len, corpus)) / len(corpus)
+    print(f'{updates_count} updates, {size:.0f} bytes on average, {len(USED_UPDATE_TYPES)} handled update types')
+    for parse in (stdlib, fast_path, validate_json):
+        seconds = timeit.timeit(lambda: [parse(bot, body) for body in corpus], number=number) / number
+        print(f'{parse.__name__:>14}: {seconds / updates_count * 10**6:8.1f} us per update')
+
+
+if __name__ == '__main__':
+    bench(*map(int, sys.argv[1:]))
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+import sys
+
+import httpx
+
+from config.settings import settings
+from db.storage.rabbit import connection_pool
+
+# Replies used to go through a durable queue per user, the RPC client made them obsolete.
+USER_QUEUE_PATTERN = r'^user_tasks\.\d+$'
+
+
+async def list_user_queues(client: httpx.AsyncClient) -> list[str]:
+    names = []
+    page = 1
+    while True:
+        response = await client.get(
+            '/api/queues/%2F',
+            params={'name': USER_QUEUE_PATTERN, 'use_regex': 'true', 'page': page, 'page_size': 500, 'columns': 'name'},
+        )
+        response.raise_for_status()
+        data = response.json()
+        names.extend(queue['name'] for queue in data['items'])
+        if page >= data['page_count']:
+            return names
+        page += 1
+
+
+async def delete_user_queues(dry_run: bool = False) -> None:
+    async with httpx.AsyncClient(
+        base_url=f'http://{settings.RABBIT_HOST}:{settings.RABBIT_MANAGEMENT_PORT}',
+        auth=(settings.RABBIT_USER, settings.RABBIT_PASSWORD),
+    ) as client:
+        names = await list_user_queues(client)
+    logging.info('Found %s per-user queues', len(names))
+    if dry_run:
+        return
+
+    async with connection_pool.acquire() as connection:
+        channel = await connection.channel()
+        for name in names:
+            await channel.queue_delete(name)
+        await channel.close()
+    logging.info('Deleted %s per-user queues', len(names))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(delete_user_queues(dry_run='--dry-run' in sys.argv))
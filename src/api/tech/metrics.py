@@ -1,4 +1,6 @@
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
 from starlette.requests import Request
 from starlette.responses import Response
 
@@ -7,4 +9,9 @@ from src.api.tech.router import router
 
 @router.get('/metrics')
 async def metrics(request: Request) -> Response:
-    return Response(generate_latest(), headers={'Content-Type': CONTENT_TYPE_LATEST})
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        # Sharded bot, the ingress reports the sum of its workers.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), headers={'Content-Type': CONTENT_TYPE_LATEST})
@@ -1,22 +1,45 @@
-import asyncio
-from asyncio import Task
 from typing import Any
 
-from aiogram.methods.base import TelegramMethod
+import orjson
+from aiogram.methods import TelegramMethod
+from aiogram.types import Update
 from fastapi.responses import ORJSONResponse
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from src import bot
 from src.api.tg.router import router
-from src.bg_task import background_tasks
+from src.bot import get_bot, get_dp, get_used_update_types
+from src.metrics_init import UPDATES_DROPPED
+from src.update_lanes import chat_key, get_update_lanes
+
+
+def update_type(update: dict[str, Any]) -> str | None:
+    return next((key for key in update if key != 'update_id'), None)
+
+
+async def feed_update(update: dict[str, Any]) -> None:
+    bot, dp = get_bot(), get_dp()
+    # Validated once, already mounted to the bot, so aiogram does not validate it again.
+    result = await dp.feed_update(bot, Update.model_validate(update, context={'bot': bot}))
+    # The webhook has been answered already, a method returned by a handler is sent as a separate request.
+    if isinstance(result, TelegramMethod):
+        await dp.silent_call_request(bot, result)
 
 
 @router.post('/webhook')
 async def webhook(request: Request) -> JSONResponse:
-    update = await request.json()
-    task: Task[TelegramMethod[Any] | None] = asyncio.create_task(bot.dp.feed_webhook_update(bot.bot, update))
-    background_tasks.add(task)
-    task.add_done_callback(background_tasks.discard)
+    lanes = get_update_lanes()
+    if lanes.draining:
+        # Shutting down, Telegram delivers the update again once a bot is back.
+        return ORJSONResponse({'status': 'draining'}, status_code=503, headers={'Retry-After': '1'})
+
+    update = orjson.loads(await request.body())
+    if (kind := update_type(update)) not in get_used_update_types():
+        UPDATES_DROPPED.labels(type=kind).inc()
+        return ORJSONResponse({'status': 'ok'})
+
+    # Updates of one chat are handled one after another, a full dispatcher makes Telegram retry later.
+    if not await lanes.submit(chat_key(update), lambda: feed_update(update)):
+        return ORJSONResponse({'status': 'busy'}, status_code=429, headers={'Retry-After': '1'})
 
     return ORJSONResponse({'status': 'ok'})
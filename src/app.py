@@ -1,8 +1,7 @@
 import asyncio
 import logging
-import time
 from contextlib import asynccontextmanager
-from datetime import datetime
+from functools import partial
 from typing import AsyncGenerator
 
 import uvicorn
@@ -14,67 +13,81 @@ from starlette_context.middleware import RawContextMiddleware
 
 from config.settings import settings
 from db.storage.db import async_session
+from db.storage.rabbit import consume_task_events
 from db.storage.redis import setup_redis
 from src.api.tech.router import router as tech_router
 from src.api.tg.router import router as tg_router
-from src.bg_task import background_tasks
+from src.bg_task import drain_background_tasks
 from src.bot import setup_bot, setup_dp
+from src.grading.pool import close_pool, setup_pool
+from src.grading.results import consume_grading_results
+from src.grading.scheduler import setup_scheduler
 from src.handlers.admin_handlers.command.router import router as admin_cmd_router
 from src.handlers.admin_handlers.state_handlers.router import router as admin_state_router
 from src.handlers.user_handlers.callback.router import router as user_callback_router
 from src.handlers.user_handlers.command.router import router as user_command_start_router
 from src.handlers.user_handlers.state_handlers.router import router as user_state_router
 from src.logger import LOGGING_CONFIG, logger
+from src.middlewares.outbound import OutboundMiddleware, get_outbound_scheduler
 from src.middlewares.rps_middleware import RequestCountMiddleware
 from src.rabbit_initializer import init_rabbitmq
+from src.rpc import close_rpc, setup_rpc
+from src.task_events import handle_task_event
+from src.update_lanes import get_update_lanes
+
+
+def include_routers(dp: Dispatcher) -> None:
+    dp.include_router(admin_cmd_router)
+    dp.include_router(admin_state_router)
+    dp.include_router(user_callback_router)
+    dp.include_router(user_command_start_router)
+    dp.include_router(user_state_router)
 
 
 @asynccontextmanager
-async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+async def lifespan(app: FastAPI, manage_webhook: bool = True, shares: int = 1) -> AsyncGenerator[None, None]:
     logging.config.dictConfig(LOGGING_CONFIG)
     logger.info('Starting lifespan')
     redis = setup_redis()
     storage = RedisStorage(redis=redis)
     bot = Bot(token=settings.BOT_TOKEN)
+    bot.session.middleware(OutboundMiddleware(get_outbound_scheduler()))
     dp = Dispatcher(storage=storage)
     setup_bot(bot)
     setup_dp(dp)
-    dp.include_router(admin_cmd_router)
-    dp.include_router(admin_state_router)
-    dp.include_router(user_callback_router)
-    dp.include_router(user_command_start_router)
-    dp.include_router(user_state_router)
+    include_routers(dp)
 
     await init_rabbitmq()
-    await bot.set_webhook(settings.BOT_WEBHOOK_URL)
-
-    temp = await bot.get_webhook_info()
+    await setup_rpc()
+    setup_scheduler(shares)
+    await setup_pool(shares)
+    task_events_consumer = asyncio.create_task(consume_task_events(handle_task_event))
+    if settings.GRADER_ENABLED:
+        results_consumer = asyncio.create_task(consume_grading_results())
+    if manage_webhook:
+        # Telegram does not even send the update types nothing handles.
+        await bot.set_webhook(settings.BOT_WEBHOOK_URL, allowed_updates=dp.resolve_used_update_types())
     logger.info('Finished start')
     yield
 
-    start_time = time.monotonic()
-    is_used = False
-    while background_tasks:
-        if (time.monotonic() - start_time) / 3600 > 0.5 and not is_used:
-            logger.warning('Background tasks has expired for more than 30 seconds')
-            is_used = True
-
-        await asyncio.sleep(0)
-
-    if background_tasks:
-        logger.warning('not all background tasks are done')
-
-    logger.info('closed background tasks...')
-    logger.info('[%s] background tasks: %s', datetime.now(), list(background_tasks))
-    await bot.delete_webhook()
-    logger.info('delete webhook...')
-    temp = await bot.get_webhook_info()
-    logger.info('WEBHOOK: %s', temp)
+    get_update_lanes().close()
+    await drain_background_tasks()
+    task_events_consumer.cancel()
+    if settings.GRADER_ENABLED:
+        results_consumer.cancel()
+    await close_pool()
+    await close_rpc()
+    if manage_webhook:
+        await bot.delete_webhook()
+        logger.info('delete webhook...')
+        temp = await bot.get_webhook_info()
+        logger.info('WEBHOOK: %s', temp)
+    await bot.session.close()
     logger.info('Ending lifespan')
 
 
-def create_app() -> FastAPI:
-    app = FastAPI(docs_url='/swagger', lifespan=lifespan)
+def create_app(manage_webhook: bool = True, shares: int = 1) -> FastAPI:
+    app = FastAPI(docs_url='/swagger', lifespan=partial(lifespan, manage_webhook=manage_webhook, shares=shares))
     app.include_router(tg_router, prefix='/tg', tags=['tg'])
     app.include_router(tech_router, prefix='/tech', tags=['tech'])
     app.middleware('http')(RequestCountMiddleware())
@@ -82,29 +95,39 @@ def create_app() -> FastAPI:
     return app
 
 
+def create_worker_app() -> FastAPI:
+    # Served by src.ingress on a Unix socket, the ingress owns the webhook and the workers share the grading capacity.
+    return create_app(manage_webhook=False, shares=settings.BOT_WORKERS)
+
+
 async def start_polling():
     logging.config.dictConfig(LOGGING_CONFIG)
     logger.info('Starting polling')
     redis = setup_redis()
     storage = RedisStorage(redis=redis)
     bot = Bot(token=settings.BOT_TOKEN)
+    bot.session.middleware(OutboundMiddleware(get_outbound_scheduler()))
     dp = Dispatcher(storage=storage)
     setup_dp(dp)
     setup_bot(bot)
-    dp.include_router(admin_cmd_router)
-    dp.include_router(admin_state_router)
-    dp.include_router(user_callback_router)
-    dp.include_router(user_command_start_router)
-    dp.include_router(user_state_router)
+    include_routers(dp)
     await bot.delete_webhook()
     await init_rabbitmq()
+    await setup_rpc()
+    await setup_pool()
+    task_events_consumer = asyncio.create_task(consume_task_events(handle_task_event))  # noqa: F841
+    if settings.GRADER_ENABLED:
+        results_consumer = asyncio.create_task(consume_grading_results())  # noqa: F841
 
     logger.info('Dependencies launched')
     await dp.start_polling(bot, dp=async_session)
 
 
 if __name__ == '__main__':
-    if settings.BOT_WEBHOOK_URL:
+    if settings.BOT_WEBHOOK_URL and settings.BOT_WORKERS > 1:
+        # Shards updates by chat between BOT_WORKERS processes.
+        uvicorn.run('src.ingress:create_ingress_app', factory=True, host='0.0.0.0', port=8001, workers=1)
+    elif settings.BOT_WEBHOOK_URL:
         uvicorn.run('src.app:create_app', factory=True, host='0.0.0.0', port=8001, workers=1)
     else:
         asyncio.run(start_polling())
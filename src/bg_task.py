@@ -1,6 +1,40 @@
+import asyncio
+import os
+import time
 from asyncio import Task
 from typing import Any
 
 from aiogram.methods import TelegramMethod
+from prometheus_client import CollectorRegistry, push_to_gateway
+
+from config.settings import settings
+from src.logger import logger
+from src.metrics_init import SHUTDOWN_DRAIN_DURATION
+from src.processes import drain_tasks
 
 background_tasks: set[Task[TelegramMethod[Any] | None]] = set()
+
+
+async def drain_background_tasks(timeout: float = settings.BOT_DRAIN_TIMEOUT) -> None:
+    start_time = time.monotonic()
+    if background_tasks:
+        logger.info('Waiting for %s background tasks...', len(background_tasks))
+        done, pending = await drain_tasks(set(background_tasks), timeout)
+        logger.info('Background tasks: %s finished, %s cancelled after %s s', len(done), len(pending), timeout)
+    duration = time.monotonic() - start_time
+    SHUTDOWN_DRAIN_DURATION.observe(duration)
+    logger.info('Drained in %.2f s', duration)
+    await push_drain_duration()
+
+
+async def push_drain_duration() -> None:
+    # The process exits right after the drain. A sharded worker writes the histogram to the ingress's multiprocess
+    # directory, which outlives it, a single process has to push it or no scrape ever sees it.
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ or not settings.BOT_METRICS_PUSHGATEWAY:
+        return
+    registry = CollectorRegistry()
+    registry.register(SHUTDOWN_DRAIN_DURATION)
+    try:
+        await asyncio.to_thread(push_to_gateway, settings.BOT_METRICS_PUSHGATEWAY, job='bot', registry=registry)
+    except OSError as e:
+        logger.warning('Could not push the drain duration: %s', e)
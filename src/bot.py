@@ -2,6 +2,7 @@ from aiogram import Bot, Dispatcher
 
 bot: Bot
 dp: Dispatcher
+used_update_types: frozenset[str] | None = None
 
 
 def setup_bot(bot_: Bot) -> None:
@@ -16,11 +17,20 @@ def get_bot() -> Bot:
 
 
 def setup_dp(dp_: Dispatcher) -> None:
-    global dp
+    global dp, used_update_types
     dp = dp_
+    used_update_types = None
 
 
 def get_dp() -> Dispatcher:
     global dp
 
     return dp
+
+
+def get_used_update_types() -> frozenset[str]:
+    # Resolved on the first update, the routers are all included by then.
+    global used_update_types
+    if used_update_types is None:
+        used_update_types = frozenset(get_dp().resolve_used_update_types())
+    return used_update_types
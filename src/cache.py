@@ -0,0 +1,67 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+from prometheus_client import Counter
+
+T = TypeVar('T')
+
+
+class LocalCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self.data[key]
+            return None
+        self.data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.data[key] = (time.monotonic() + self.ttl, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self.data.pop(key, None)
+
+    def clear(self) -> None:
+        self.data.clear()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class Coalescer(Generic[T]):
+    def __init__(self, requests: Counter, started: str) -> None:
+        # Counted with result=started for calls that run, result='coalesced' for calls that join a running one.
+        self.requests = requests
+        self.started = started
+        self.inflight: dict[Hashable, asyncio.Task[T]] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        if (shared := self.inflight.get(key)) is None:
+            self.requests.labels(result=self.started).inc()
+            shared = asyncio.create_task(call())
+            self.inflight[key] = shared
+            shared.add_done_callback(partial(self.forget, key))
+        else:
+            self.requests.labels(result='coalesced').inc()
+        # One caller giving up must not cancel the call for the others.
+        return await asyncio.shield(shared)
+
+    def forget(self, key: Hashable, task: asyncio.Task[T]) -> None:
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        if not task.cancelled():
+            task.exception()
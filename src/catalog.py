@@ -0,0 +1,128 @@
+from collections import defaultdict
+from functools import partial
+from typing import Any, Awaitable, Callable
+
+import msgpack
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from config.settings import settings
+from consumer.schema.task import GetTaskByIdMessage, GetTaskPageMessage
+from db.storage.redis import get_redis
+from src.cache import LocalCache
+from src.logger import logger
+from src.metrics_init import CATALOG_CACHE_REQUESTS
+from src.rpc import get_rpc
+
+
+def tasks_key(complexity: str) -> str:
+    return f'catalog:tasks:{complexity}'
+
+
+def task_key(task_id: str) -> str:
+    return f'catalog:task:{task_id}'
+
+
+class CatalogCache:
+    def __init__(self, ttl: int = settings.CATALOG_CACHE_TTL, local_size: int = settings.CATALOG_CACHE_LOCAL_SIZE):
+        self.ttl = ttl
+        self.local = LocalCache(maxsize=local_size, ttl=ttl)
+        # Bumped on invalidation so that a load started before it does not store stale data.
+        self.generations: defaultdict[str, int] = defaultdict(int)
+
+    async def get(self, key: str, load: Callable[[], Awaitable[Any | None]], field: str | None = None) -> Any | None:
+        # Entries with a field are stored in a Redis hash under the key, so invalidating the key drops all of them.
+        generation = self.generations[key]
+        local_key = key if field is None else (key, field, generation)
+        if (value := self.local.get(local_key)) is not None:
+            CATALOG_CACHE_REQUESTS.labels(result='local_hit').inc()
+            return value
+
+        packed = None
+        if (redis := get_redis()) is not None:
+            try:
+                packed = await (redis.get(key) if field is None else redis.hget(key, field))
+            except RedisError as e:
+                logger.warning('Catalog cache is unavailable: %s', e)
+        if packed is not None:
+            CATALOG_CACHE_REQUESTS.labels(result='redis_hit').inc()
+            value = msgpack.unpackb(packed)
+        else:
+            CATALOG_CACHE_REQUESTS.labels(result='miss').inc()
+            value = await load()
+            if value is None or generation != self.generations[key]:
+                return value
+            if redis is not None:
+                try:
+                    await self.store(redis, key, field, msgpack.packb(value))
+                except RedisError as e:
+                    logger.warning('Catalog cache is unavailable: %s', e)
+
+        if generation == self.generations[key]:
+            self.local.set(local_key, value)
+        return value
+
+    async def store(self, redis: Redis, key: str, field: str | None, packed: bytes) -> None:
+        if field is None:
+            await redis.set(key, packed, ex=self.ttl)
+            return
+        async with redis.pipeline(transaction=True) as pipe:
+            await pipe.hset(key, field, packed).expire(key, self.ttl).execute()
+
+    async def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            # Entries with a field are keyed by the generation locally, bumping it makes them unreachable.
+            self.generations[key] += 1
+            self.local.delete(key)
+        if (redis := get_redis()) is not None:
+            try:
+                await redis.delete(*keys)
+            except RedisError as e:
+                logger.warning('Catalog cache is unavailable: %s', e)
+
+
+catalog_cache = CatalogCache()
+
+
+async def request_task_page(complexity: str, cursor: str | None, direction: str, user_id: int) -> dict | None:
+    reply = await get_rpc().call(
+        GetTaskPageMessage(
+            user_id=user_id,
+            complexity=complexity,
+            cursor=cursor,
+            direction=direction,
+            limit=settings.CATALOG_PAGE_SIZE,
+            action='get_task_page',
+            event='tasks',
+        ),
+        coalesce_key=f'get_task_page:{complexity}:{direction}:{cursor}',
+    )
+    return reply.get('page')
+
+
+async def request_task(task_id: str, user_id: int) -> dict | None:
+    reply = await get_rpc().call(
+        GetTaskByIdMessage(task_id=task_id, user_id=user_id, action='get_task_by_id', event='tasks'),
+        coalesce_key=f'get_task_by_id:{task_id}',
+    )
+    return reply.get('task')
+
+
+async def request_task_tests(task_id: str, user_id: int) -> dict | None:
+    # The full task with its test data, only fetched to build a grading suite and never cached here.
+    reply = await get_rpc().call(
+        GetTaskByIdMessage(task_id=task_id, user_id=user_id, action='get_task_tests', event='tasks'),
+        coalesce_key=f'get_task_tests:{task_id}',
+    )
+    return reply.get('task')
+
+
+async def get_task_page(
+    complexity: str, user_id: int, cursor: str | None = None, direction: str = 'next'
+) -> dict | None:
+    load = partial(request_task_page, complexity, cursor, direction, user_id)
+    return await catalog_cache.get(tasks_key(complexity), load, f'{direction}:{cursor}')
+
+
+async def get_task(task_id: str, user_id: int) -> dict | None:
+    return await catalog_cache.get(task_key(task_id), partial(request_task, task_id, user_id))
@@ -0,0 +1,65 @@
+import ast
+import hashlib
+
+from redis.exceptions import RedisError
+
+from config.settings import settings
+from consumer.logger import logger
+from db.storage.redis import get_redis
+from src.cache import LocalCache
+from src.grading.suite import TaskSuite
+from src.metrics_init import GRADING_CACHE_REQUESTS
+
+
+def code_fingerprint(user_code: str) -> str | None:
+    # ast.dump drops comments, blank lines and formatting, so equivalent solutions share a fingerprint.
+    try:
+        tree = ast.parse(user_code)
+    except SyntaxError:
+        return None
+    return hashlib.sha256(ast.dump(tree).encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, ttl: int = settings.GRADING_CACHE_TTL, local_size: int = settings.GRADING_CACHE_LOCAL_SIZE):
+        self.ttl = ttl
+        self.local = LocalCache(maxsize=local_size, ttl=min(ttl, 600))
+
+    def key(self, suite: TaskSuite, user_code: str) -> str | None:
+        fingerprint = code_fingerprint(user_code)
+        if fingerprint is None:
+            return None
+        return f'grading:{suite.task_id}:{suite.version}:{fingerprint}'
+
+    async def get(self, key: str | None) -> str | None:
+        if key is None or not settings.GRADING_CACHE_ENABLED:
+            return None
+        if (verdict := self.local.get(key)) is not None:
+            GRADING_CACHE_REQUESTS.labels(result='local_hit').inc()
+            return verdict
+        verdict = None
+        if (redis := get_redis()) is not None:
+            try:
+                verdict = await redis.get(key)
+            except RedisError as e:
+                logger.warning('Grading cache is unavailable: %s', e)
+        if verdict is None:
+            GRADING_CACHE_REQUESTS.labels(result='miss').inc()
+            return None
+        verdict = verdict.decode()
+        self.local.set(key, verdict)
+        GRADING_CACHE_REQUESTS.labels(result='redis_hit').inc()
+        return verdict
+
+    async def set(self, key: str | None, verdict: str) -> None:
+        if key is None or not settings.GRADING_CACHE_ENABLED:
+            return
+        self.local.set(key, verdict)
+        if (redis := get_redis()) is not None:
+            try:
+                await redis.set(key, verdict, ex=self.ttl)
+            except RedisError as e:
+                logger.warning('Grading cache is unavailable: %s', e)
+
+
+result_cache = ResultCache()
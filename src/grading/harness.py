@@ -0,0 +1,240 @@
+# Runs inside the sandbox as the limited user, so only the standard library may be used here.
+import io
+import json
+import linecache
+import math
+import os
+import resource
+import select
+import signal
+import sys
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from typing import TextIO
+
+SOLUTION_FILENAME = '<solution>'
+OUTPUT_LIMIT_ERROR = 'Output limit exceeded'
+TIME_LIMIT_ERROR = 'Time limit exceeded'
+MEMORY_LIMIT_ERROR = 'Memory limit exceeded'
+DEFAULT_OUTPUT_LIMIT = 64 * 1024
+
+# Imported once by the zygote so that forked children get them for free.
+PRELOADED_MODULES = (
+    'bisect', 'collections', 'copy', 'dataclasses', 'datetime', 'decimal', 'fractions', 'functools', 'heapq',
+    'itertools', 'math', 'operator', 're', 'random', 'statistics', 'string', 'typing',
+)  # fmt: skip
+
+
+class OutputLimitExceeded(BaseException):
+    pass
+
+
+class TimeLimitExceeded(BaseException):
+    pass
+
+
+class LimitedOutput(io.StringIO):
+    def __init__(self, limit: int, initial: str = '') -> None:
+        super().__init__()
+        self.limit = limit
+        self.size = 0
+        self.exceeded = False
+        self.write(initial)
+
+    def write(self, s: str) -> int:
+        self.size += len(s.encode(errors='replace'))
+        if self.size > self.limit:
+            # Stays set even if the user code swallows the exception.
+            self.exceeded = True
+            raise OutputLimitExceeded
+        return super().write(s)
+
+
+def format_error(exc: BaseException) -> str:
+    if isinstance(exc, TimeLimitExceeded):
+        return TIME_LIMIT_ERROR
+    if isinstance(exc, MemoryError):
+        return MEMORY_LIMIT_ERROR
+    tb = exc.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != SOLUTION_FILENAME:
+        tb = tb.tb_next
+    return ''.join(traceback.format_exception(type(exc), exc, tb))
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def on_cpu_limit(signum: int, frame: object) -> None:
+    raise TimeLimitExceeded
+
+
+def lower_limit(kind: int, value: int) -> None:
+    _, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(kind, (value, value))
+
+
+def apply_limits(limits: dict, case_count: int) -> None:
+    lower_limit(resource.RLIMIT_AS, limits['memory_mb'] * 1024 * 1024)
+    lower_limit(resource.RLIMIT_FSIZE, limits['file_size_kb'] * 1024)
+    lower_limit(resource.RLIMIT_NPROC, limits['processes'])
+    # Writing past the file size limit should fail with an OSError instead of killing the process.
+    signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+    signal.signal(signal.SIGXCPU, on_cpu_limit)
+    # The hard limit bounds the whole job even if the user code keeps swallowing TimeLimitExceeded.
+    lower_limit(resource.RLIMIT_CPU, math.ceil(cpu_seconds() + limits['time'] * (case_count + 1)) + 1)
+
+
+def start_cpu_budget(seconds: float) -> None:
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = math.ceil(cpu_seconds() + seconds)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def run_job(job: dict, proto: TextIO) -> None:
+    user_code = job['code']
+    func_name = job['func_name']
+    limit = job.get('output_limit', DEFAULT_OUTPUT_LIMIT)
+    limits = job.get('limits')
+    linecache.cache[SOLUTION_FILENAME] = (len(user_code), None, user_code.splitlines(True), SOLUTION_FILENAME)
+    if limits:
+        apply_limits(limits, len(job['tests']))
+
+    def start() -> tuple[float, float]:
+        if limits:
+            start_cpu_budget(limits['time'])
+        return time.perf_counter(), cpu_seconds()
+
+    def report(index: int, out: LimitedOutput, err: LimitedOutput, error: str, started: tuple[float, float]) -> None:
+        if out.exceeded or err.exceeded:
+            error = OUTPUT_LIMIT_ERROR
+        elif error not in (TIME_LIMIT_ERROR, MEMORY_LIMIT_ERROR):
+            error = (err.getvalue() + error).strip()[-limit:]
+        frame = {
+            'index': index,
+            'output': out.getvalue().strip(),
+            'error': error,
+            'elapsed': time.perf_counter() - started[0],
+            'cpu_time': cpu_seconds() - started[1],
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+        proto.write(json.dumps(frame) + '\n')
+        proto.flush()
+
+    namespace = {'__name__': '__main__', '__builtins__': __builtins__}
+    module_out, module_err = LimitedOutput(limit), LimitedOutput(limit)
+    started = start()
+    try:
+        code = compile(user_code, SOLUTION_FILENAME, 'exec')
+        with redirect_stdout(module_out), redirect_stderr(module_err):
+            exec(code, namespace)  # noqa: S102
+        func = namespace[func_name]
+    except BaseException as e:  # noqa: B036
+        report(0, module_out, module_err, format_error(e), started)
+        return
+    if module_out.exceeded or module_err.exceeded:
+        report(0, module_out, module_err, '', started)
+        return
+
+    for index, args in enumerate(job['tests']):
+        out, err = LimitedOutput(limit, module_out.getvalue()), LimitedOutput(limit, module_err.getvalue())
+        error = ''
+        started = start()
+        try:
+            with redirect_stdout(out), redirect_stderr(err):
+                print(func(*args))
+        except BaseException as e:  # noqa: B036
+            error = format_error(e)
+        report(index, out, err, error, started)
+
+
+def detach_stdout() -> TextIO:
+    # User code must not be able to write into the protocol stream through fd 1 or sys.__stdout__.
+    proto = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    return proto
+
+
+def main() -> None:
+    proto = detach_stdout()
+    run_job(json.loads(sys.stdin.readline()), proto)
+
+
+def current_rss_kb() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+class LineReader:
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+        self.buffer = b''
+        self.eof = False
+
+    def has_line(self) -> bool:
+        return b'\n' in self.buffer or self.eof
+
+    def readline(self) -> str:
+        while not self.has_line():
+            chunk = os.read(self.fd, 65536)
+            self.buffer += chunk
+            self.eof = not chunk
+        line, sep, self.buffer = self.buffer.partition(b'\n')
+        return (line + sep).decode()
+
+
+def serve() -> None:
+    for module in PRELOADED_MODULES:
+        __import__(module)
+
+    proto = detach_stdout()
+    control = LineReader(0)
+    proto.write(json.dumps({'ready': True, 'rss_kb': current_rss_kb()}) + '\n')
+    proto.flush()
+
+    while line := control.readline():
+        job = json.loads(line)
+        if 'cancel' in job:
+            continue
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                devnull = os.open(os.devnull, os.O_RDONLY)
+                os.dup2(devnull, 0)
+                run_job(job, proto)
+            finally:
+                os._exit(0)
+
+        pidfd = os.pidfd_open(pid)
+        cancelled = False
+        while not cancelled:
+            if not control.has_line():
+                ready, _, _ = select.select([pidfd, control.fd], [], [])
+                if pidfd in ready:
+                    break
+            command = control.readline()
+            if not command or 'cancel' in json.loads(command):
+                os.kill(pid, signal.SIGKILL)
+                cancelled = True
+        _, _, usage = os.wait4(pid, 0)
+        os.close(pidfd)
+
+        done = {'done': True, 'cancelled': cancelled, 'rss_kb': current_rss_kb(), 'child_rss_kb': usage.ru_maxrss}
+        proto.write(json.dumps(done) + '\n')
+        proto.flush()
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['zygote']:
+        serve()
+    else:
+        main()
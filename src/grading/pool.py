@@ -0,0 +1,283 @@
+import asyncio
+import json
+import os
+import pwd
+import subprocess
+from contextlib import aclosing, asynccontextmanager, suppress
+from dataclasses import asdict
+from typing import AsyncIterator, Awaitable, Callable
+
+from config.settings import settings
+from consumer.logger import logger
+from src.grading.runner import (
+    HARNESS_SOURCE,
+    CaseResult,
+    Limits,
+    OutputLimitExceeded,
+    protocol_limit,
+    read_cases,
+    read_frame,
+    run_user_tests,
+)
+from src.metrics_init import SANDBOX_POOL_BUSY, SANDBOX_POOL_FALLBACKS, SANDBOX_POOL_IDLE
+
+ZYGOTE_START_TIMEOUT = 10
+
+
+class ZygoteWorker:
+    def __init__(self, username: str, restricted_dir: str, output_limit: int = settings.SANDBOX_OUTPUT_LIMIT) -> None:
+        self.username = username
+        self.restricted_dir = restricted_dir
+        self.output_limit = output_limit
+        self.proc: asyncio.subprocess.Process | None = None
+        self.jobs_done = 0
+        self.rss_kb = 0
+        self.broken = False
+
+    async def start(self) -> None:
+        command = ('python3', '-I', '-c', HARNESS_SOURCE, 'zygote')
+        if os.geteuid() == 0:
+            # Running inside the privileged supervisor: drop privileges directly instead of going through sudo.
+            user = pwd.getpwnam(self.username)
+            privileges = {'user': user.pw_uid, 'group': user.pw_gid, 'extra_groups': [], 'env': {'PATH': os.defpath}}
+        else:
+            command = ('sudo', '-u', self.username, 'env', *command)
+            privileges = {}
+
+        self.proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.restricted_dir,
+            limit=protocol_limit(self.output_limit),
+            **privileges,
+        )
+        line = await asyncio.wait_for(self.proc.stdout.readline(), ZYGOTE_START_TIMEOUT)
+        if not line:
+            raise ConnectionError('zygote exited before it was ready')
+        self.rss_kb = json.loads(line)['rss_kb']
+
+    async def stop(self) -> None:
+        if self.proc is None or self.proc.returncode is not None:
+            return
+        self.proc.stdin.close()
+        try:
+            await asyncio.wait_for(self.proc.wait(), 1)
+        except asyncio.TimeoutError:
+            self.proc.terminate()
+            await self.proc.wait()
+
+    async def send(self, frame: dict) -> None:
+        self.proc.stdin.write(json.dumps(frame).encode() + b'\n')
+        await self.proc.stdin.drain()
+
+    async def read_frame(self, timeout: float) -> dict:
+        line = await read_frame(self.proc.stdout, timeout)
+        if not line:
+            raise ConnectionError('zygote exited')
+        return json.loads(line)
+
+    async def run(
+        self, user_code: str, func_name: str, tests: list[tuple], limits: Limits
+    ) -> AsyncIterator[CaseResult]:
+        self.jobs_done += 1
+        done = False
+        try:
+            await self.send(
+                {
+                    'code': user_code,
+                    'func_name': func_name,
+                    'tests': [list(args) for args in tests],
+                    'output_limit': self.output_limit,
+                    'limits': asdict(limits),
+                }
+            )
+
+            async def on_exit(frame: dict | None) -> str:
+                nonlocal done
+                if frame is None:
+                    self.broken = True
+                elif 'done' in frame:
+                    done = True
+                    self.record_usage(frame)
+                return ''
+
+            async with aclosing(read_cases(self.proc.stdout, tests, limits, on_exit=on_exit)) as cases:
+                async for case in cases:
+                    yield case
+        except OSError:
+            self.broken = True
+            raise
+        finally:
+            if not done and not self.broken:
+                await self.finish_job()
+
+    async def finish_job(self) -> None:
+        try:
+            await self.send({'cancel': True})
+            while 'done' not in (frame := await self.read_frame(timeout=1)):
+                continue
+            self.record_usage(frame)
+        except (asyncio.TimeoutError, ConnectionError, OutputLimitExceeded, OSError, ValueError):
+            # ValueError: the rest of an oversized frame was still in the pipe.
+            logger.warning('Sandbox zygote did not finish the job, recycling it')
+            self.broken = True
+        except asyncio.CancelledError:
+            # Unread frames of this job would leak into the next one.
+            self.broken = True
+            raise
+
+    def record_usage(self, frame: dict) -> None:
+        # The zygote itself barely grows, the forked job is what touches memory.
+        self.rss_kb = max(frame['rss_kb'], frame.get('child_rss_kb', 0))
+
+
+class ZygotePool:
+    def __init__(
+        self,
+        size: int = settings.SANDBOX_POOL_SIZE,
+        max_jobs: int = settings.SANDBOX_POOL_MAX_JOBS,
+        max_rss_mb: int = settings.SANDBOX_POOL_MAX_RSS_MB,
+        username: str = settings.SANDBOX_USER,
+        restricted_dir: str = settings.SANDBOX_DIR,
+        acquire_timeout: float = settings.SANDBOX_POOL_ACQUIRE_TIMEOUT,
+        max_spawn_failures: int = settings.SANDBOX_POOL_MAX_SPAWN_FAILURES,
+        spawn_backoff: float = 1,
+    ) -> None:
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_kb = max_rss_mb * 1024
+        self.username = username
+        self.restricted_dir = restricted_dir
+        self.acquire_timeout = acquire_timeout
+        self.max_spawn_failures = max_spawn_failures
+        self.spawn_backoff = spawn_backoff
+        self.idle: asyncio.Queue[ZygoteWorker] = asyncio.Queue()
+        self.workers: set[ZygoteWorker] = set()
+        self.busy = 0
+        self.spawn_failures = 0
+        self.replacements: set[asyncio.Task[None]] = set()
+        self.closed = False
+
+    async def start(self) -> None:
+        await asyncio.gather(*(self.spawn() for _ in range(self.size)))
+        logger.info('Sandbox pool started with %s workers', self.size)
+
+    async def close(self) -> None:
+        self.closed = True
+        for task in self.replacements:
+            task.cancel()
+        # Busy workers too, their jobs end with a crashed case.
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+        self.workers.clear()
+        while not self.idle.empty():
+            self.idle.get_nowait()
+        SANDBOX_POOL_IDLE.set(0)
+
+    async def spawn(self, delay: float = 0) -> None:
+        await asyncio.sleep(delay)
+        worker = ZygoteWorker(self.username, self.restricted_dir)
+        try:
+            await worker.start()
+        except Exception:
+            logger.exception('Failed to start sandbox zygote')
+            await worker.stop()
+            self.spawn_failures += 1
+            if self.spawn_failures >= self.max_spawn_failures:
+                # Jobs go to one-shot sandboxes from now on instead of waiting for a zygote that never comes.
+                logger.error('Sandbox zygotes failed to start %s times in a row, giving up', self.spawn_failures)
+                return
+            self.replace(min(self.spawn_backoff * 2 ** (self.spawn_failures - 1), 60))
+            return
+        self.spawn_failures = 0
+        self.workers.add(worker)
+        self.idle.put_nowait(worker)
+        SANDBOX_POOL_IDLE.set(self.idle.qsize())
+
+    def replace(self, delay: float = 0) -> None:
+        if self.closed:
+            return
+        task = asyncio.create_task(self.spawn(delay))
+        self.replacements.add(task)
+        task.add_done_callback(self.replacements.discard)
+
+    def needs_recycling(self, worker: ZygoteWorker) -> bool:
+        return (
+            worker.broken
+            or worker.proc.returncode is not None
+            or worker.jobs_done >= self.max_jobs
+            or worker.rss_kb >= self.max_rss_kb
+        )
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[ZygoteWorker | None]:
+        worker = None
+        if self.workers or self.replacements:
+            with suppress(asyncio.TimeoutError):
+                worker = await asyncio.wait_for(self.idle.get(), self.acquire_timeout)
+        if worker is None:
+            yield None
+            return
+        self.busy += 1
+        SANDBOX_POOL_IDLE.set(self.idle.qsize())
+        SANDBOX_POOL_BUSY.set(self.busy)
+        try:
+            yield worker
+        finally:
+            self.busy -= 1
+            SANDBOX_POOL_BUSY.set(self.busy)
+            if self.needs_recycling(worker):
+                self.workers.discard(worker)
+                await worker.stop()
+                self.replace()
+            else:
+                self.idle.put_nowait(worker)
+                SANDBOX_POOL_IDLE.set(self.idle.qsize())
+
+    async def run(
+        self,
+        user_code: str,
+        func_name: str,
+        tests: list[tuple],
+        limits: Limits = Limits(),
+        on_start: Callable[[], Awaitable[None]] | None = None,
+    ) -> AsyncIterator[CaseResult]:
+        async with self.acquire() as worker:
+            if on_start is not None:
+                await on_start()
+            if worker is None:
+                logger.warning('No sandbox zygote is available, running the job in a one-shot sandbox')
+                SANDBOX_POOL_FALLBACKS.inc()
+                cases = run_user_tests(user_code, func_name, tests, self.restricted_dir, self.username, limits)
+            else:
+                cases = worker.run(user_code, func_name, tests, limits)
+            async with aclosing(cases) as cases:
+                async for case in cases:
+                    yield case
+
+
+pool: ZygotePool | None = None
+
+
+async def setup_pool(shares: int = 1) -> ZygotePool | None:
+    global pool
+
+    if settings.SANDBOX_POOL_SIZE > 0:
+        pool = ZygotePool(size=max(1, settings.SANDBOX_POOL_SIZE // shares))
+        await pool.start()
+    return pool
+
+
+def get_pool() -> ZygotePool | None:
+    global pool
+
+    return pool
+
+
+async def close_pool() -> None:
+    global pool
+
+    if pool is not None:
+        await pool.close()
+        pool = None
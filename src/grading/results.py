@@ -0,0 +1,36 @@
+import msgpack
+
+from config.settings import settings
+from consumer.schema.grading import GradingResultMessage
+from db.storage.rabbit import channel_pool
+from src.bot import get_bot
+from src.keyboards.user_kb import solution_result_kb
+from src.logger import logger
+from src.metrics_init import RABBITMQ_MESSAGES_CONSUMED
+
+
+async def send_grading_result(chat_id: int, result: str, complexity: str | None, task_id: str) -> None:
+    bot = get_bot()
+    kb = solution_result_kb(result, complexity, task_id)
+    if result.startswith('Решение неверное'):
+        await bot.send_message(chat_id, result, reply_markup=kb)
+    else:
+        await bot.send_message(chat_id, result, reply_markup=kb, parse_mode='HTML')
+
+
+async def consume_grading_results() -> None:
+    logger.info('Starting grading results consumer...')
+    # A verdict answers the user's own submission, it keeps the default interactive priority.
+    async with channel_pool.acquire() as channel:
+        await channel.set_qos(prefetch_count=10)
+
+        queue = await channel.declare_queue(settings.GRADING_RESULTS_QUEUE, durable=True)
+        async with queue.iterator() as queue_iter:
+            async for message in queue_iter:
+                RABBITMQ_MESSAGES_CONSUMED.inc()
+                try:
+                    async with message.process():
+                        body: GradingResultMessage = msgpack.unpackb(message.body)
+                        await send_grading_result(body['chat_id'], body['result'], body['complexity'], body['task_id'])
+                except Exception:
+                    logger.exception('Failed to deliver a grading result')
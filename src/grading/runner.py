@@ -0,0 +1,172 @@
+import asyncio
+import json
+import math
+import resource
+import subprocess
+from contextlib import aclosing
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
+
+from config.settings import settings
+from consumer.logger import logger
+from src.grading.harness import OUTPUT_LIMIT_ERROR
+
+HARNESS_SOURCE = (Path(__file__).parent / 'harness.py').read_text()
+
+
+class OutputLimitExceeded(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Limits:
+    # Seconds per test case, both of CPU time and of wall-clock time.
+    time: float = settings.SANDBOX_TIMEOUT
+    memory_mb: int = settings.SANDBOX_MEMORY_LIMIT_MB
+    file_size_kb: int = settings.SANDBOX_FILE_SIZE_LIMIT_KB
+    processes: int = settings.SANDBOX_MAX_PROCESSES
+
+
+@dataclass
+class CaseResult:
+    index: int
+    output: str
+    error: str
+    elapsed: float = 0.0
+    cpu_time: float = 0.0
+    max_rss_kb: int = 0
+    # Set for timeouts and crashes of the sandbox itself, such verdicts depend on the load and must not be cached.
+    transient: bool = False
+
+
+def timed_out(index: int, timeout: float) -> CaseResult:
+    return CaseResult(index, 'Execution timed out', f'Process was killed after {timeout} seconds.', transient=True)
+
+
+def crashed(index: int, error: str = '') -> CaseResult:
+    return CaseResult(index, '', error or 'Process exited unexpectedly.', transient=True)
+
+
+def output_limit_exceeded(index: int) -> CaseResult:
+    return CaseResult(index, '', OUTPUT_LIMIT_ERROR)
+
+
+def protocol_limit(output_limit: int) -> int:
+    # Output and error of a case may each grow up to six times when escaped into a JSON frame.
+    return 12 * output_limit + 4096
+
+
+def set_rlimits(limits: Limits) -> None:
+    # Used as preexec_fn by the legacy runner, sudo passes the limits on to the interpreter.
+    cpu = math.ceil(limits.time) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    resource.setrlimit(resource.RLIMIT_AS, (limits.memory_mb * 1024 * 1024,) * 2)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (limits.file_size_kb * 1024,) * 2)
+
+
+async def read_frame(stream: asyncio.StreamReader, timeout: float) -> bytes:
+    try:
+        return await asyncio.wait_for(stream.readline(), timeout)
+    except ValueError:
+        # StreamReader refuses lines longer than its limit instead of buffering them.
+        raise OutputLimitExceeded from None
+
+
+async def read_cases(
+    reader: asyncio.StreamReader,
+    tests: list[tuple],
+    limits: Limits,
+    first_timeout: float | None = None,
+    on_exit: Callable[[dict | None], Awaitable[str]] | None = None,
+) -> AsyncIterator[CaseResult]:
+    # Stops after the first failing case. on_exit gets the frame the sandbox ended the job with, None when it exited,
+    # and returns the error to report.
+    timeout = limits.time if first_timeout is None else first_timeout
+    for index in range(len(tests)):
+        try:
+            line = await read_frame(reader, timeout)
+        except asyncio.TimeoutError:
+            logger.info("user's code is running more than %s seconds", limits.time)
+            yield timed_out(index, limits.time)
+            return
+        except OutputLimitExceeded:
+            logger.info("user's code exceeded the output limit")
+            yield output_limit_exceeded(index)
+            return
+
+        frame = json.loads(line) if line else None
+        if frame is None or 'index' not in frame:
+            yield crashed(index, '' if on_exit is None else await on_exit(frame))
+            return
+
+        case = CaseResult(**frame)
+        yield case
+        if case.error:
+            return
+        timeout = limits.time
+
+
+async def read_limited(stream: asyncio.StreamReader, limit: int) -> bytes:
+    data = bytearray()
+    while chunk := await stream.read(65536):
+        data += chunk
+        if len(data) > limit:
+            raise OutputLimitExceeded
+    return bytes(data)
+
+
+async def run_user_tests(
+    user_code: str,
+    func_name: str,
+    tests: list[tuple],
+    restricted_dir: str = settings.SANDBOX_DIR,
+    username: str = settings.SANDBOX_USER,
+    limits: Limits = Limits(),
+    output_limit: int = settings.SANDBOX_OUTPUT_LIMIT,
+) -> AsyncIterator[CaseResult]:
+    proc = await asyncio.create_subprocess_exec(
+        'sudo', '-u', username, 'env', 'python3', '-I', '-c', HARNESS_SOURCE,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=restricted_dir,
+        limit=protocol_limit(output_limit),
+        start_new_session=True,
+    )  # fmt: skip
+    try:
+        job = {
+            'code': user_code,
+            'func_name': func_name,
+            'tests': [list(args) for args in tests],
+            'output_limit': output_limit,
+            'limits': asdict(limits),
+        }
+        proc.stdin.write(json.dumps(job).encode() + b'\n')
+        await proc.stdin.drain()
+        proc.stdin.close()
+
+        async def on_exit(frame: dict | None) -> str:
+            proc.kill()
+            return (await proc.stderr.read(output_limit)).decode().strip()
+
+        # Starting sudo and the interpreter is not the user's time.
+        async with aclosing(read_cases(proc.stdout, tests, limits, limits.time + 1, on_exit)) as cases:
+            async for case in cases:
+                yield case
+    finally:
+        await stop_process(proc, username)
+
+
+async def stop_process(proc: asyncio.subprocess.Process, username: str = settings.SANDBOX_USER) -> None:
+    if proc.returncode is None:
+        # The interpreter may ignore SIGTERM and sleep below its CPU limit. sudo leads a session of its own, so the
+        # sandbox user kills everything it runs in that session, and only then sudo itself.
+        killer = await asyncio.create_subprocess_exec(
+            'sudo', '-u', username, 'pkill', '-KILL', '-s', str(proc.pid), '-u', username,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )  # fmt: skip
+        await killer.wait()
+        proc.kill()
+    await proc.wait()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from config.settings import settings
+from src.metrics_init import GRADING_QUEUE_DEPTH, GRADING_QUEUE_WAIT, GRADING_RUNNING
+
+
+class GradingScheduler:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.running = 0
+        # Users are served round-robin in the order of this dict, each user's own submissions in FIFO order.
+        self.waiting: dict[int, deque[asyncio.Future[None]]] = {}
+        self.avg_duration = 1.0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self.waiting.values())
+
+    def position(self, user_id: int) -> int:
+        if self.running < self.capacity and not self.waiting:
+            return 0
+        own = len(self.waiting.get(user_id, ()))
+        return own + sum(min(len(waiters), own + 1) for user, waiters in self.waiting.items() if user != user_id) + 1
+
+    def estimated_wait(self, user_id: int) -> float:
+        return self.position(user_id) * self.avg_duration / self.capacity
+
+    @asynccontextmanager
+    async def slot(self, user_id: int) -> AsyncIterator[None]:
+        start_time = time.monotonic()
+        if self.running < self.capacity and not self.waiting:
+            self.running += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiting.setdefault(user_id, deque()).append(waiter)
+            self.update_metrics()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over right before the cancellation, pass it on.
+                    self.release()
+                else:
+                    self.forget(user_id, waiter)
+                raise
+
+        GRADING_QUEUE_WAIT.observe(time.monotonic() - start_time)
+        self.update_metrics()
+        run_start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.avg_duration = 0.9 * self.avg_duration + 0.1 * (time.monotonic() - run_start)
+            self.release()
+
+    def forget(self, user_id: int, waiter: asyncio.Future[None]) -> None:
+        waiters = self.waiting.get(user_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self.waiting[user_id]
+        self.update_metrics()
+
+    def release(self) -> None:
+        while self.waiting:
+            user_id = next(iter(self.waiting))
+            waiters = self.waiting.pop(user_id)
+            waiter = waiters.popleft()
+            if waiters:
+                self.waiting[user_id] = waiters
+            if not waiter.done():
+                waiter.set_result(None)
+                self.update_metrics()
+                return
+        self.running -= 1
+        self.update_metrics()
+
+    def update_metrics(self) -> None:
+        GRADING_QUEUE_DEPTH.set(self.queued)
+        GRADING_RUNNING.set(self.running)
+
+
+scheduler = GradingScheduler(settings.GRADING_CONCURRENCY or os.cpu_count() or 1)
+
+
+def setup_scheduler(shares: int = 1) -> None:
+    global scheduler
+    scheduler = GradingScheduler(max(1, (settings.GRADING_CONCURRENCY or os.cpu_count() or 1) // shares))
+
+
+def get_scheduler() -> GradingScheduler:
+    return scheduler
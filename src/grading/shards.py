@@ -0,0 +1,66 @@
+import asyncio
+import math
+from contextlib import aclosing
+from typing import AsyncIterator, Callable
+
+from src.grading.runner import CaseResult, crashed
+
+
+def split(count: int, shards: int) -> list[range]:
+    size = math.ceil(count / shards)
+    return [range(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+async def run_sharded(
+    run: Callable[[list[tuple]], AsyncIterator[CaseResult]],
+    tests: list[tuple],
+    shards: int,
+    failed: Callable[[CaseResult], bool],
+) -> AsyncIterator[CaseResult]:
+    # Cases are yielded in index order and the stream ends with the lowest failing one, like a sequential run.
+    ranges = split(len(tests), shards)
+    results: asyncio.Queue[tuple[int, CaseResult | Exception | None]] = asyncio.Queue()
+
+    async def feed(shard: int, indices: range) -> None:
+        try:
+            async with aclosing(run(list(tests[indices.start : indices.stop]))) as cases:
+                async for case in cases:
+                    case.index += indices.start
+                    results.put_nowait((shard, case))
+        except Exception as e:
+            results.put_nowait((shard, e))
+        else:
+            results.put_nowait((shard, None))
+
+    tasks = [asyncio.create_task(feed(shard, indices)) for shard, indices in enumerate(ranges)]
+    finished: set[int] = set()
+    pending: dict[int, CaseResult] = {}
+    next_index = 0
+    try:
+        while next_index < len(tests):
+            if (case := pending.pop(next_index, None)) is not None:
+                yield case
+                if case.error or failed(case):
+                    return
+                next_index += 1
+                continue
+            if next_index // len(ranges[0]) in finished:
+                # The shard stopped without reporting this case, the solution must not pass because of that.
+                yield crashed(next_index)
+                return
+
+            shard, item = await results.get()
+            if isinstance(item, Exception):
+                raise item
+            if item is None:
+                finished.add(shard)
+                continue
+            pending[item.index] = item
+            if item.error or failed(item):
+                # Later shards can only find failures with higher numbers.
+                for task in tasks[shard + 1 :]:
+                    task.cancel()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,89 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from config.settings import settings
+from consumer.logger import logger
+from db.model.task import Task
+from src.cache import LocalCache
+from src.grading.runner import Limits
+from src.metrics_init import GRADING_SUITE_CACHE_REQUESTS
+
+SUITE_FIELDS = ('input_data', 'correct_answer', 'secret_input', 'secret_answer', 'time_limit', 'memory_limit_mb')
+
+
+@dataclass(frozen=True)
+class TaskSuite:
+    task_id: str
+    complexity: str
+    version: str
+    tests: tuple[tuple, ...]
+    expected: tuple[str, ...]
+    public_count: int
+    # Numbering of secret tests starts after all public inputs, even those without an answer.
+    secret_start: int
+    secret_missing: bool
+    limits: Limits = Limits()
+
+
+def task_data_version(task: Task) -> str:
+    digest = hashlib.sha1()
+    for field in SUITE_FIELDS:
+        digest.update(str(task.get(field)).encode() + b'\0')
+    return digest.hexdigest()[:16]
+
+
+def build_suite(task: Task) -> TaskSuite | None:
+    input_data = json.loads(task.get('input_data'))
+    correct_answers = json.loads(task.get('correct_answer'))
+    if input_data is None or correct_answers is None:
+        return None
+
+    secret_input = json.loads(task.get('secret_input'))
+    secret_answers = json.loads(task.get('secret_answer'))
+    secret_missing = secret_answers is None or secret_input is None
+
+    public_cases = list(zip(input_data, correct_answers))
+    secret_cases = [] if secret_missing else list(zip(secret_input, secret_answers))
+    return TaskSuite(
+        task_id=str(task.get('id')),
+        complexity=task.get('complexity'),
+        version=task_data_version(task),
+        tests=tuple(tuple(test_args) for test_args, _ in public_cases + secret_cases),
+        expected=tuple(str(expected_output) for _, expected_output in public_cases + secret_cases),
+        public_count=len(public_cases),
+        secret_start=len(input_data),
+        secret_missing=secret_missing,
+        limits=Limits(
+            time=task.get('time_limit') or settings.SANDBOX_TIMEOUT,
+            memory_mb=task.get('memory_limit_mb') or settings.SANDBOX_MEMORY_LIMIT_MB,
+        ),
+    )
+
+
+class SuiteCache:
+    def __init__(self, maxsize: int = settings.GRADING_SUITE_CACHE_SIZE, ttl: float = settings.GRADING_SUITE_CACHE_TTL):
+        self.local = LocalCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, task_id: str, load: Callable[[], Awaitable[Task | None]]) -> TaskSuite | None:
+        if (suite := self.local.get(task_id)) is not None:
+            GRADING_SUITE_CACHE_REQUESTS.labels(result='hit').inc()
+            return suite
+
+        GRADING_SUITE_CACHE_REQUESTS.labels(result='miss').inc()
+        task = await load()
+        if task is None:
+            return None
+        suite = build_suite(task)
+        if suite is None:
+            logger.error('Not exist input data or correct answers!!! TASK ID: %s', task_id)
+            return None
+        self.local.set(task_id, suite)
+        return suite
+
+    def invalidate(self, task_id: str) -> None:
+        self.local.delete(task_id)
+
+
+suite_cache = SuiteCache()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging.config
+import os
+import shutil
+import signal
+from contextlib import aclosing, suppress
+from dataclasses import asdict
+from functools import partial
+from typing import AsyncIterator
+
+from config.settings import settings
+from consumer.logger import LOGGING_CONFIG, logger
+from src.grading.pool import ZYGOTE_START_TIMEOUT, ZygotePool
+from src.grading.runner import CaseResult, Limits, OutputLimitExceeded, crashed, protocol_limit, read_cases, read_frame
+
+DEFAULT_SOCKET = '/run/sandbox/supervisor.sock'
+
+
+async def stream_job(pool: ZygotePool, job: dict, writer: asyncio.StreamWriter) -> None:
+    tests = [tuple(args) for args in job['tests']]
+    limits = Limits(**job['limits'])
+
+    async def send(frame: dict) -> None:
+        writer.write(json.dumps(frame).encode() + b'\n')
+        await writer.drain()
+
+    # The bot starts its per-case timeouts only once a worker has the job, waiting for one is not the user's time.
+    started = partial(send, {'started': True})
+    async with aclosing(pool.run(job['code'], job['func_name'], tests, limits, on_start=started)) as cases:
+        async for case in cases:
+            await send(asdict(case))
+
+
+async def handle_client(pool: ZygotePool, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        line = await reader.readline()
+    except ValueError:
+        limit = protocol_limit(settings.SANDBOX_OUTPUT_LIMIT)
+        logger.warning('Sandbox job is longer than %s bytes, dropping it', limit)
+        line = b''
+    if not line:
+        writer.close()
+        return
+
+    job = asyncio.create_task(stream_job(pool, json.loads(line), writer))
+    # The bot closes the connection as soon as it has seen a failing case; stop the job right away then.
+    hangup = asyncio.create_task(reader.read())
+    try:
+        await asyncio.wait({job, hangup}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        hangup.cancel()
+        job.cancel()
+        try:
+            await job
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        except Exception:
+            logger.exception('Sandbox job failed')
+        writer.close()
+
+
+async def start_server(pool: ZygotePool, path: str) -> asyncio.Server:
+    # A job line carries every test input, it may be far longer than the default 64 KiB of a line.
+    limit = protocol_limit(settings.SANDBOX_OUTPUT_LIMIT)
+    return await asyncio.start_unix_server(lambda r, w: handle_client(pool, r, w), path=path, limit=limit)
+
+
+async def serve(path: str) -> None:
+    logging.config.dictConfig(LOGGING_CONFIG)
+    if not os.path.isdir(settings.SANDBOX_DIR):
+        raise RuntimeError(f'{settings.SANDBOX_DIR} does not exist, run scripts/restricted_dir_usr_create.py first')
+
+    pool = ZygotePool(size=settings.SANDBOX_POOL_SIZE or os.cpu_count())
+    await pool.start()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with suppress(FileNotFoundError):
+        os.remove(path)
+    server = await start_server(pool, path)
+    os.chmod(path, 0o660)
+    if settings.SANDBOX_SUPERVISOR_GROUP:
+        # The bot does not run as root, it reaches the socket through this group.
+        shutil.chown(path, group=settings.SANDBOX_SUPERVISOR_GROUP)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info('Sandbox supervisor is listening on %s', path)
+    async with server:
+        await stop.wait()
+    await pool.close()
+    logger.info('Sandbox supervisor stopped')
+
+
+async def run_in_supervisor(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    user_code: str,
+    func_name: str,
+    tests: list[tuple],
+    limits: Limits = Limits(),
+) -> AsyncIterator[CaseResult]:
+    try:
+        job = {
+            'code': user_code,
+            'func_name': func_name,
+            'tests': [list(args) for args in tests],
+            'limits': asdict(limits),
+        }
+        writer.write(json.dumps(job).encode() + b'\n')
+        await writer.drain()
+
+        # Queueing for a free worker is bounded by the pool's acquire timeout, it does not count as the user's time.
+        try:
+            line = await read_frame(reader, settings.SANDBOX_POOL_ACQUIRE_TIMEOUT + ZYGOTE_START_TIMEOUT)
+        except (asyncio.TimeoutError, OutputLimitExceeded):
+            line = b''
+        if 'started' not in json.loads(line or b'{}'):
+            yield crashed(0)
+            return
+
+        # The supervisor times each case from before the bot sees the previous frame, this only guards against a hang.
+        async with aclosing(read_cases(reader, tests, limits)) as cases:
+            async for case in cases:
+                yield case
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(serve(settings.SANDBOX_SUPERVISOR_SOCKET or DEFAULT_SOCKET))
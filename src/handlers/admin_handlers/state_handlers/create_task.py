@@ -1,16 +1,17 @@
 import logging
 import re
+import time
 from uuid import uuid4
 
 import aio_pika
 import msgpack
-from aio_pika import ExchangeType
 from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
+from config.settings import settings
 from consumer.schema.task import CreateTaskMessage
-from db.storage.rabbit import channel_pool
+from db.storage.rabbit import publisher
 from src.handlers.admin_handlers.state_handlers.router import router
 from src.keyboards.admin_kb import admin_complex_kb
 from src.states.create_task import CreateTaskState
@@ -25,6 +26,16 @@ async def parse_input(value: str):
     raise ValueError('Некорректный формат ввода. Используйте число или текст в кавычках.')
 
 
+async def parse_limit(value: str, kind: type[int] | type[float]) -> int | float | None:
+    # A dash leaves the limit unset, so the global one from the settings applies.
+    if value.strip() == '-':
+        return None
+    limit = kind(value.strip().replace(',', '.'))
+    if not 0 < limit < float('inf'):
+        raise ValueError
+    return limit
+
+
 @router.message(CreateTaskState.waiting_for_title)
 async def waiting_for_title(message: Message, state: FSMContext):
     title = message.text
@@ -148,35 +159,66 @@ async def waiting_for_secret_answer(message: Message, state: FSMContext):
                 parse_mode='HTML',
             )
         else:
-            await save_task_to_database(message, state)
+            await message.answer(
+                f'Введите <b>ограничение по времени</b> на тест в секундах или «-» для значения по умолчанию '
+                f'({settings.SANDBOX_TIMEOUT:g} с)',
+                parse_mode='HTML',
+            )
+            await state.set_state(CreateTaskState.waiting_for_time_limit)
     except ValueError as e:
         await message.answer(str(e))
 
 
+@router.message(CreateTaskState.waiting_for_time_limit)
+async def waiting_for_time_limit(message: Message, state: FSMContext):
+    try:
+        time_limit = await parse_limit(message.text, float)
+        await state.update_data(time_limit=time_limit)
+        await message.answer(
+            f'Введите <b>ограничение по памяти</b> в мегабайтах или «-» для значения по умолчанию '
+            f'({settings.SANDBOX_MEMORY_LIMIT_MB} МБ)',
+            parse_mode='HTML',
+        )
+        await state.set_state(CreateTaskState.waiting_for_memory_limit)
+    except ValueError:
+        await message.answer('Введите положительное число секунд или «-».')
+
+
+@router.message(CreateTaskState.waiting_for_memory_limit)
+async def waiting_for_memory_limit(message: Message, state: FSMContext):
+    try:
+        memory_limit_mb = await parse_limit(message.text, int)
+        await state.update_data(memory_limit_mb=memory_limit_mb)
+        await save_task_to_database(message, state)
+    except ValueError:
+        await message.answer('Введите положительное целое число мегабайт или «-».')
+
+
 async def save_task_to_database(message: Message, state: FSMContext):
     data = await state.get_data()
     try:
-        async with channel_pool.acquire() as channel:  # type: aio_pika.Channel
-            exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
-            await exchange.publish(
-                aio_pika.Message(
-                    msgpack.packb(
-                        CreateTaskMessage(
-                            id=str(uuid4()),
-                            title=data['title'],
-                            description=data['description'],
-                            complexity=data['complexity'],
-                            input_data=data['input_tests'],
-                            correct_answer=data['correct_answers'],
-                            secret_input=data['secret_tests'],
-                            secret_answer=data['secret_answers'],
-                            event='tasks',
-                            action='create_task',
-                        )
+        await publisher.publish(
+            aio_pika.Message(
+                msgpack.packb(
+                    CreateTaskMessage(
+                        id=str(uuid4()),
+                        title=data['title'],
+                        description=data['description'],
+                        complexity=data['complexity'],
+                        input_data=data['input_tests'],
+                        correct_answer=data['correct_answers'],
+                        secret_input=data['secret_tests'],
+                        secret_answer=data['secret_answers'],
+                        time_limit=data.get('time_limit'),
+                        memory_limit_mb=data.get('memory_limit_mb'),
+                        event='tasks',
+                        action='create_task',
                     )
                 ),
-                routing_key='user_messages',
-            )
+                headers={'published_at': time.time()},
+            ),
+            routing_key='user_messages',
+        )
         await message.answer('Задача успешно сохранена в базу данных.')
     except aio_pika.exceptions.AMQPError as amqp_error:
         await message.answer('Ошибка при работе с RabbitMQ.')
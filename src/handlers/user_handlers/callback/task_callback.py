@@ -1,21 +1,15 @@
 import asyncio
 import logging
 
-import aio_pika
-import msgpack
-from aio_pika import ExchangeType
-from aio_pika.exceptions import QueueEmpty
 from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 
-from config.settings import settings
-from consumer.schema.task import GetTaskByIdMessage, TaskMessage
-from db.storage.rabbit import channel_pool
+from src.catalog import get_task, get_task_page
 from src.handlers.user_handlers.callback.router import router
 from src.keyboards.user_kb import complex_kb, generate_carousel_keyboard
 from src.logger import LOGGING_CONFIG, logger
-from src.metrics_init import RABBITMQ_MESSAGES_CONSUMED, RABBITMQ_MESSAGES_PRODUCED, measure_time
+from src.metrics_init import measure_time
 from src.states.task_answer import TaskAnswerState
 
 logging.config.dictConfig(LOGGING_CONFIG)
@@ -40,85 +34,38 @@ async def get_another_task(callback: CallbackQuery):
 async def get_tasks(callback: CallbackQuery):
     complexity = callback.data.split('_')[1]
 
-    async with channel_pool.acquire() as channel:  # type: aio_pika.Channel
-        exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
-
-        RABBITMQ_MESSAGES_PRODUCED.inc()
-        await exchange.publish(
-            aio_pika.Message(
-                msgpack.packb(
-                    TaskMessage(
-                        user_id=callback.from_user.id,
-                        action=f'get_tasks_by_complexity:{complexity}',
-                        event='tasks',
-                    )
-                ),
-            ),
-            'user_messages',
-        )
-        queue = await channel.declare_queue(
-            settings.USER_TASK_QUEUE_TEMPLATE.format(user_id=callback.from_user.id),
-            durable=True,
-        )
-        retries = 3
-        for _ in range(retries):
-            try:
-                tasks = await queue.get()
-                parsed_tasks = msgpack.unpackb(tasks.body).get('tasks')
-                if parsed_tasks:
-                    RABBITMQ_MESSAGES_CONSUMED.inc()
-                    break
-            except QueueEmpty:
-                await asyncio.sleep(0.02)
+    try:
+        page = await get_task_page(complexity, callback.from_user.id)
+    except asyncio.TimeoutError:
+        logger.error('No reply from the consumer for %s', callback.data)
+        await callback.message.answer('Технические шоколадки. Попробуйте позже!')
+        return
 
     try:
-        kb = await generate_carousel_keyboard(parsed_tasks, f'select_task:{complexity}')
+        kb = await generate_carousel_keyboard(page, f'select_task:{complexity}')
         txt = f'Сложность: <b>{complexity}</b>'
         await callback.message.edit_text(text=txt, reply_markup=kb, parse_mode='HTML')
     except TypeError as type_err:
         logger.critical(type_err)
 
 
-@router.callback_query(F.data.regexp(r'^select_task:(hard|easy|normal):(next|prev):\d+$'))
+@router.callback_query(F.data.regexp(r'^select_task:(hard|easy|normal):(next|prev):([0-9a-f-]{36}|\d+)$'))
 @measure_time
 async def handle_carousel(callback: CallbackQuery):
-    data = callback.data.split(':')
-    page = int(data[3]) if len(data) > 3 else 0
-    complexity = data[1]
-
-    async with channel_pool.acquire() as channel:  # type: aio_pika.Channel
-        exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
-
-        RABBITMQ_MESSAGES_PRODUCED.inc()
-        await exchange.publish(
-            aio_pika.Message(
-                msgpack.packb(
-                    TaskMessage(
-                        user_id=callback.from_user.id,
-                        action=f'get_tasks_by_complexity:{complexity}',
-                        event='tasks',
-                    )
-                ),
-            ),
-            'user_messages',
-        )
-        queue = await channel.declare_queue(
-            settings.USER_TASK_QUEUE_TEMPLATE.format(user_id=callback.from_user.id),
-            durable=True,
-        )
-        retries = 3
-        for _ in range(retries):
-            try:
-                tasks = await queue.get()
-                parsed_tasks = msgpack.unpackb(tasks.body).get('tasks')
-                if parsed_tasks:
-                    RABBITMQ_MESSAGES_CONSUMED.inc()
-                    break
-            except QueueEmpty:
-                await asyncio.sleep(0.02)
-
-    if parsed_tasks:
-        keyboard = await generate_carousel_keyboard(parsed_tasks, f'select_task:{complexity}', page)
+    _, complexity, direction, cursor = callback.data.split(':')
+    if cursor.isdigit():
+        # Buttons sent before keyset pagination carry a page number, they open the first page.
+        direction, cursor = 'next', None
+
+    try:
+        page = await get_task_page(complexity, callback.from_user.id, cursor, direction)
+    except asyncio.TimeoutError:
+        logger.error('No reply from the consumer for %s', callback.data)
+        await callback.message.answer('Технические шоколадки. Попробуйте позже!')
+        return
+
+    if page and page['items']:
+        keyboard = await generate_carousel_keyboard(page, f'select_task:{complexity}')
         await callback.message.edit_text(
             text=f'Сложность: <b>{complexity}</b>', reply_markup=keyboard, parse_mode='HTML'
         )
@@ -131,37 +78,12 @@ async def handle_carousel(callback: CallbackQuery):
 async def chosen_task(callback: CallbackQuery, state: FSMContext):
     await state.clear()
     _, complexity, task_id = callback.data.split(':')
-    async with channel_pool.acquire() as channel:  # type: aio_pika.Channel
-        exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
-
-        RABBITMQ_MESSAGES_PRODUCED.inc()
-        await exchange.publish(
-            aio_pika.Message(
-                msgpack.packb(
-                    GetTaskByIdMessage(
-                        task_id=task_id,
-                        user_id=callback.from_user.id,
-                        action='get_task_by_id',
-                        event='tasks',
-                    )
-                ),
-            ),
-            'user_messages',
-        )
-        queue = await channel.declare_queue(
-            settings.USER_TASK_QUEUE_TEMPLATE.format(user_id=callback.from_user.id),
-            durable=True,
-        )
-        retries = 3
-        for _ in range(retries):
-            try:
-                q_task = await queue.get()
-                task = msgpack.unpackb(q_task.body).get('task')
-                if task:
-                    RABBITMQ_MESSAGES_CONSUMED.inc()
-                    break
-            except QueueEmpty:
-                await asyncio.sleep(0.02)
+    try:
+        task = await get_task(task_id, callback.from_user.id)
+    except asyncio.TimeoutError:
+        logger.error('No reply from the consumer for %s', callback.data)
+        await callback.message.answer('Технические шоколадки. Попробуйте позже!')
+        return
 
     try:
         title_text = f"<b>Задача: {task['title']}</b>"
@@ -1,33 +1,12 @@
-from aio_pika import ExchangeType
 from aiogram.filters.command import CommandStart
 from aiogram.types import Message
 
-from config.settings import settings
-from db.storage.rabbit import channel_pool
 from src.handlers.user_handlers.command.router import router
 from src.keyboards.user_kb import start_kb
 
 
 @router.message(CommandStart())
 async def start_handler(message: Message):
-
-    async with channel_pool.acquire() as channel:  # type: aio_pika.Channel
-        exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
-
-        queue = await channel.declare_queue(
-            settings.USER_TASK_QUEUE_TEMPLATE.format(
-                user_id=message.from_user.id,
-            ),
-            durable=True,
-        )
-
-        await queue.bind(
-            exchange,
-            settings.USER_TASK_QUEUE_TEMPLATE.format(
-                user_id=message.from_user.id,
-            ),
-        )
-
     txt = (
         'Привет! 👋\n\n'
         '<b>Добро пожаловать в нашего бота для изучения Python! 🐍</b>\n\n'
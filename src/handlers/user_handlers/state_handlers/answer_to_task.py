@@ -1,19 +1,22 @@
 import asyncio
 import logging
-from asyncio import QueueEmpty
+from functools import partial
 
 import aio_pika
 import msgpack
 from aiogram.fsm.context import FSMContext
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.types import Message
 
 from config.settings import settings
-from consumer.schema.task import GetTaskByIdMessage
-from db.storage.rabbit import channel_pool
+from consumer.schema.grading import GradeTaskMessage
+from db.storage.rabbit import publisher
 from src.bot import get_bot
+from src.catalog import request_task_tests
+from src.grading.results import send_grading_result
+from src.grading.suite import suite_cache
 from src.handlers.user_handlers.state_handlers.router import router
-from src.logger import LOGGING_CONFIG
-from src.metrics_init import RABBITMQ_MESSAGES_CONSUMED, RABBITMQ_MESSAGES_PRODUCED, measure_time
+from src.logger import LOGGING_CONFIG, logger
+from src.metrics_init import RABBITMQ_MESSAGES_PRODUCED, measure_time
 from src.states.task_answer import TaskAnswerState
 from src.utils import check_user_task_solution
 
@@ -30,60 +33,50 @@ async def process_answer(message: Message, state: FSMContext):
     bot = get_bot()
     await bot.edit_message_reply_markup(chat_id=message.chat.id, message_id=message_id)
 
-    async with channel_pool.acquire() as channel:
-        exchange = await channel.declare_exchange('user_tasks', aio_pika.ExchangeType.TOPIC, durable=True)
+    if settings.GRADER_ENABLED:
+        await submit_for_grading(message, state, task_id)
+        return
 
-        RABBITMQ_MESSAGES_PRODUCED.inc()
-        await exchange.publish(
-            aio_pika.Message(
-                msgpack.packb(
-                    GetTaskByIdMessage(
-                        task_id=task_id,
-                        user_id=user_id,
-                        action='get_task_by_id',
-                        event='tasks',
-                    )
-                ),
-            ),
-            'user_messages',
-        )
-        queue = await channel.declare_queue(
-            settings.USER_TASK_QUEUE_TEMPLATE.format(user_id=message.from_user.id),
-            durable=True,
-        )
-        retries = 3
-        for _ in range(retries):
-            try:
-                q_task = await queue.get()
-                task = msgpack.unpackb(q_task.body).get('task')
-                if task:
-                    RABBITMQ_MESSAGES_CONSUMED.inc()
-                    break
-            except QueueEmpty:
-                await asyncio.sleep(0.02)
+    suite = await suite_cache.get(task_id, partial(fetch_task, task_id, user_id))
 
-    result = await check_user_task_solution(python_code, task)
+    result = await check_user_task_solution(
+        python_code, suite, message.from_user.id, partial(report_queue_position, message)
+    )
 
     await state.clear()
-    kb = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text='Попробовать снова', callback_data=f"select_task:{task.get('complexity')}:{task_id}"
+    await send_grading_result(message.chat.id, result, suite and suite.complexity, task_id)
+
+
+async def report_queue_position(message: Message, position: int, wait: float) -> None:
+    await message.answer(f'Ваше решение в очереди на проверку: место {position}, примерное ожидание {round(wait)} с.')
+
+
+async def fetch_task(task_id: str, user_id: int) -> dict | None:
+    try:
+        return await request_task_tests(task_id, user_id)
+    except asyncio.TimeoutError:
+        logger.error('No reply from the consumer for task %s', task_id)
+        return None
+
+
+async def submit_for_grading(message: Message, state: FSMContext, task_id: str):
+    RABBITMQ_MESSAGES_PRODUCED.inc()
+    await publisher.publish(
+        aio_pika.Message(
+            msgpack.packb(
+                GradeTaskMessage(
+                    user_id=message.from_user.id,
+                    chat_id=message.chat.id,
+                    task_id=task_id,
+                    code=message.text,
+                    event='grading',
+                    action='grade',
                 )
-            ],
-            [InlineKeyboardButton(text='Выбрать другую задачу', callback_data='get_another_task')],
-        ]
-    )
-    if result.startswith('Решение неверное'):
-        await message.answer(result, reply_markup=kb)
-    else:
-        await message.answer(
-            result,
-            reply_markup=InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [InlineKeyboardButton(text='Выбрать следующую задачу', callback_data='get_another_task')]
-                ]
             ),
-            parse_mode='HTML',
-        )
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        ),
+        settings.GRADING_JOBS_QUEUE,
+    )
+
+    await state.clear()
+    await message.answer('Решение отправлено на проверку ⏳')
@@ -0,0 +1,184 @@
+import asyncio
+import logging.config
+import os
+import random
+from contextlib import asynccontextmanager
+from functools import partial
+from multiprocessing.process import BaseProcess
+from multiprocessing.synchronize import Event
+from typing import AsyncGenerator
+
+import aiohttp
+import orjson
+import uvicorn
+from aiogram import Bot, Dispatcher
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from starlette.requests import Request
+from starlette.responses import Response
+
+from config.settings import settings
+from src.api.tech.router import router as tech_router
+from src.app import include_routers
+from src.logger import LOGGING_CONFIG, logger
+from src.processes import ProcessSupervisor
+from src.update_lanes import chat_key
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    # Lamping and Veach: growing the number of buckets from n to n + 1 moves only 1 / (n + 1) of the keys.
+    key &= 0xFFFFFFFFFFFFFFFF
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * (1 << 31) / ((key >> 33) + 1))
+    return bucket
+
+
+def run_worker(app: str, path: str, ready: Event) -> None:
+    asyncio.run(serve(app, path, ready))
+
+
+async def serve(app: str, path: str, ready: Event) -> None:
+    server = uvicorn.Server(uvicorn.Config(app, factory=True, uds=path))
+    serving = asyncio.create_task(server.serve())
+    while not server.started and not serving.done():
+        await asyncio.sleep(0.1)
+    if server.started:
+        ready.set()
+    await serving
+
+
+class Ingress(ProcessSupervisor):
+    def __init__(
+        self,
+        workers: int = settings.BOT_WORKERS,
+        app: str = 'src.app:create_worker_app',
+        socket_dir: str = settings.BOT_SOCKET_DIR,
+        metrics_dir: str = settings.BOT_METRICS_DIR,
+        drain_timeout: float = settings.BOT_DRAIN_TIMEOUT,
+    ) -> None:
+        super().__init__(run_worker, 'Bot worker', logger, metrics_dir, settings.BOT_START_TIMEOUT, drain_timeout)
+        self.workers = workers
+        self.app = app
+        self.socket_dir = socket_dir
+        self.children: list[BaseProcess] = []
+        self.sessions: list[aiohttp.ClientSession] = []
+        # The last forwarded update of every chat, the next one from that chat is sent after it was accepted.
+        self.tails: dict[int, asyncio.Task[Response]] = {}
+        self.watcher: asyncio.Task[None] | None = None
+
+    def socket(self, index: int) -> str:
+        return os.path.join(self.socket_dir, f'bot-{index}.sock')
+
+    def shard(self, key: int | None) -> int:
+        return random.randrange(self.workers) if key is None else jump_hash(key, self.workers)
+
+    async def start(self) -> None:
+        self.setup_metrics()
+        os.makedirs(self.socket_dir, exist_ok=True)
+
+        logger.info('Starting %s bot workers...', self.workers)
+        spawning = (asyncio.to_thread(self.spawn, self.app, self.socket(i)) for i in range(self.workers))
+        self.children = list(await asyncio.gather(*spawning))
+        self.sessions = [
+            aiohttp.ClientSession(connector=aiohttp.UnixConnector(self.socket(i))) for i in range(self.workers)
+        ]
+        self.watcher = asyncio.create_task(self.watch())
+
+    async def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.cancel()
+        logger.info('Draining %s bot workers...', len(self.children))
+        await asyncio.gather(*(asyncio.to_thread(self.stop, child) for child in self.children))
+        for session in self.sessions:
+            await session.close()
+
+    async def watch(self) -> None:
+        while True:
+            await asyncio.sleep(1)
+            for index, child in enumerate(self.children):
+                if not child.is_alive():
+                    logger.warning('Bot worker %s exited with %s, replacing it', child.pid, child.exitcode)
+                    self.reap(child)
+                    self.children[index] = await asyncio.to_thread(self.spawn, self.app, self.socket(index))
+
+    async def forward(self, body: bytes) -> Response:
+        key = chat_key(orjson.loads(body))
+        previous = None if key is None else self.tails.get(key)
+        task = asyncio.create_task(self.send(self.shard(key), body, previous))
+        if key is not None:
+            self.tails[key] = task
+            task.add_done_callback(partial(self.done, key))
+        return await task
+
+    async def send(self, index: int, body: bytes, previous: asyncio.Task[Response] | None) -> Response:
+        if previous is not None:
+            await asyncio.wait((previous,))
+        try:
+            return await self.post(index, body)
+        except aiohttp.ClientError:
+            logger.warning('Bot worker %s is unavailable', index)
+            return ORJSONResponse({'status': 'unavailable'}, status_code=503, headers={'Retry-After': '1'})
+
+    async def post(self, index: int, body: bytes) -> Response:
+        headers = {'Content-Type': 'application/json'}
+        async with self.sessions[index].post('http://bot/tg/webhook', data=body, headers=headers) as response:
+            retry_after = response.headers.get('Retry-After')
+            return Response(
+                await response.read(),
+                status_code=response.status,
+                headers=None if retry_after is None else {'Retry-After': retry_after},
+                media_type='application/json',
+            )
+
+    def done(self, key: int, task: asyncio.Task[Response]) -> None:
+        if self.tails.get(key) is task:
+            del self.tails[key]
+
+
+ingress: Ingress
+
+
+def setup_ingress(ingress_: Ingress) -> None:
+    global ingress
+    ingress = ingress_
+
+
+def get_ingress() -> Ingress:
+    global ingress
+
+    return ingress
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    logging.config.dictConfig(LOGGING_CONFIG)
+    logger.info('Starting ingress')
+    bot = Bot(token=settings.BOT_TOKEN)
+    setup_ingress(Ingress())
+    await get_ingress().start()
+    # Only the ingress talks to Telegram about the webhook, a worker restarting must not remove it.
+    dp = Dispatcher()
+    include_routers(dp)
+    await bot.set_webhook(settings.BOT_WEBHOOK_URL, allowed_updates=dp.resolve_used_update_types())
+    logger.info('Finished start')
+    yield
+
+    await get_ingress().close()
+    await bot.delete_webhook()
+    await bot.session.close()
+    logger.info('Ending ingress')
+
+
+async def webhook(request: Request) -> Response:
+    # Updates of one chat always go to the same worker, so its lanes and in-process caches stay valid.
+    return await get_ingress().forward(await request.body())
+
+
+def create_ingress_app() -> FastAPI:
+    app = FastAPI(docs_url=None, lifespan=lifespan)
+    app.add_api_route('/tg/webhook', webhook, methods=['POST'])
+    app.include_router(tech_router, prefix='/tech', tags=['tech'])
+    return app
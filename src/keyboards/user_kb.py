@@ -13,23 +13,34 @@ complex_kb = InlineKeyboardMarkup(
 )
 
 
-async def generate_carousel_keyboard(items, callback_prefix, page=0, page_size=4):
+def solution_result_kb(result: str, complexity: str | None, task_id: str) -> InlineKeyboardMarkup:
+    if result.startswith('Решение неверное'):
+        return InlineKeyboardMarkup(
+            inline_keyboard=[
+                [InlineKeyboardButton(text='Попробовать снова', callback_data=f'select_task:{complexity}:{task_id}')],
+                [InlineKeyboardButton(text='Выбрать другую задачу', callback_data='get_another_task')],
+            ]
+        )
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text='Выбрать следующую задачу', callback_data='get_another_task')]]
+    )
+
+
+async def generate_carousel_keyboard(page, callback_prefix):
     keyboard_buttons = []
-    start_index = page * page_size
-    end_index = start_index + page_size
-    current_items = items[start_index:end_index]
-    for item in current_items:
+    for item in page['items']:
         button = InlineKeyboardButton(text=item['title'], callback_data=f"{callback_prefix}:{item['id']}")
         keyboard_buttons.append([button])
 
+    # The cursors are the ids of the tasks at the page edges, the consumer reads the neighbouring page from them.
     navigation_buttons = []
-    if page > 0:
+    if page['has_prev'] and page['items']:
         navigation_buttons.append(
-            InlineKeyboardButton(text='⬅️ Назад', callback_data=f'{callback_prefix}:prev:{page - 1}')
+            InlineKeyboardButton(text='⬅️ Назад', callback_data=f"{callback_prefix}:prev:{page['items'][0]['id']}")
         )
-    if end_index < len(items):
+    if page['has_next'] and page['items']:
         navigation_buttons.append(
-            InlineKeyboardButton(text='➡️ Вперед', callback_data=f'{callback_prefix}:next:{page + 1}')
+            InlineKeyboardButton(text='➡️ Вперед', callback_data=f"{callback_prefix}:next:{page['items'][-1]['id']}")
         )
 
     if navigation_buttons:
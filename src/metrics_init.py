@@ -1,12 +1,65 @@
 import time
 from functools import wraps
 
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 REQUESTS_TOTAL = Counter('http_requests_total', 'Total HTTP Requests', ['method', 'path'])
 INTEGRATION_METHOD_DURATION = Histogram('integration_method_duration_seconds', 'Time spent in integration methods')
 RABBITMQ_MESSAGES_PRODUCED = Counter('rabbitmq_messages_produced_total', 'Total messages produced to RabbitMQ')
 RABBITMQ_MESSAGES_CONSUMED = Counter('rabbitmq_messages_consumed_total', 'Total messages consumed from RabbitMQ')
+# rate(rpc_requests_total{result="coalesced"}) / rate(rpc_requests_total) is the coalescing ratio.
+RPC_REQUESTS = Counter('rpc_requests_total', 'RPC requests, sent or joined to a pending identical one', ['result'])
+SANDBOX_POOL_IDLE = Gauge(
+    'sandbox_pool_idle_workers',
+    'Warm sandbox workers waiting for a job',
+    multiprocess_mode='livesum',
+)
+SANDBOX_POOL_BUSY = Gauge('sandbox_pool_busy_workers', 'Sandbox workers running a job', multiprocess_mode='livesum')
+SANDBOX_POOL_FALLBACKS = Counter('sandbox_pool_fallbacks_total', 'Jobs run in a one-shot sandbox, no zygote was free')
+SANDBOX_CASE_CPU_SECONDS = Histogram(
+    'sandbox_case_cpu_seconds',
+    'CPU time used by one test case',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+SANDBOX_CASE_MAX_RSS = Histogram(
+    'sandbox_case_max_rss_bytes',
+    'Peak RSS of the sandboxed interpreter after a test case',
+    buckets=tuple(mb * 1024 * 1024 for mb in (8, 16, 32, 64, 128, 256, 512)),
+)
+GRADING_RUNNING = Gauge('grading_running', 'Submissions being checked right now', multiprocess_mode='livesum')
+GRADING_QUEUE_DEPTH = Gauge(
+    'grading_queue_depth',
+    'Submissions waiting for a free grading slot',
+    multiprocess_mode='livesum',
+)
+GRADING_QUEUE_WAIT = Histogram('grading_queue_wait_seconds', 'Time a submission waited for a grading slot')
+GRADING_CACHE_REQUESTS = Counter('grading_cache_requests_total', 'Grading result cache lookups', ['result'])
+CATALOG_CACHE_REQUESTS = Counter('catalog_cache_requests_total', 'Task catalog cache lookups', ['result'])
+GRADING_SUITE_CACHE_REQUESTS = Counter('grading_suite_cache_requests_total', 'Test suite cache lookups', ['result'])
+UPDATE_LANES = Gauge('update_lanes', 'Chats with updates being handled or waiting', multiprocess_mode='livesum')
+UPDATES_IN_FLIGHT = Gauge(
+    'updates_in_flight',
+    'Webhook updates accepted and not handled yet',
+    multiprocess_mode='livesum',
+)
+SHUTDOWN_DRAIN_DURATION = Histogram(
+    'shutdown_drain_duration_seconds',
+    'Time spent waiting for background tasks on shutdown',
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 30, 60),
+)
+UPDATES_REJECTED = Counter(
+    'updates_rejected_total',
+    'Webhook updates answered with 429, because one chat or the whole bot was saturated',
+    ['reason'],
+)
+OUTBOUND_QUEUE_TIME = Histogram(
+    'outbound_queue_seconds',
+    'Time a Telegram request waited for the rate limits',
+    ['priority'],
+    buckets=(0.005, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+TELEGRAM_RETRY_AFTER = Counter('telegram_retry_after_total', 'Requests throttled by Telegram with a 429', ['priority'])
+UPDATES_DROPPED = Counter('updates_dropped_total', 'Webhook updates of types without handlers', ['type'])
 
 
 def measure_time(func):
@@ -0,0 +1,142 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextvars import ContextVar
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from config.settings import settings
+from src.logger import logger
+from src.metrics_init import OUTBOUND_QUEUE_TIME, TELEGRAM_RETRY_AFTER
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BULK: 'bulk'}
+CHAT_BUCKETS_LIMIT = 10000
+
+# Replies to a user's own action, grading verdicts included, go first. Broadcasts to many users set BULK.
+outbound_priority: ContextVar[int] = ContextVar('outbound_priority', default=INTERACTIVE)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        self.refill(now)
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def reserve(self, now: float) -> float:
+        # Takes a token in advance, the caller sleeps for the returned delay before using it.
+        self.refill(now)
+        self.tokens -= 1
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, now: float, seconds: float) -> None:
+        self.refill(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class OutboundScheduler:
+    def __init__(
+        self,
+        rate: float = settings.OUTBOUND_RATE / settings.BOT_WORKERS,
+        chat_rate: float = settings.OUTBOUND_CHAT_RATE,
+        chat_burst: int = settings.OUTBOUND_CHAT_BURST,
+    ) -> None:
+        # Chats are sharded between bot workers, the global limit of the token is split between them.
+        self.bucket = TokenBucket(rate, rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.chats: dict[int | str, TokenBucket] = {}
+        self.waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self.counter = itertools.count()
+        self.pump_task: asyncio.Task[None] | None = None
+
+    def chat(self, chat_id: int | str) -> TokenBucket:
+        if (bucket := self.chats.get(chat_id)) is None:
+            if len(self.chats) >= CHAT_BUCKETS_LIMIT:
+                self.prune()
+            bucket = self.chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def prune(self) -> None:
+        now = time.monotonic()
+        for chat_id, bucket in list(self.chats.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self.chats[chat_id]
+
+    async def acquire(self, chat_id: int | str, priority: int) -> None:
+        if (delay := self.chat(chat_id).reserve(time.monotonic())) > 0:
+            await asyncio.sleep(delay)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.counter), future))
+        if self.pump_task is None or self.pump_task.done():
+            self.pump_task = asyncio.create_task(self.pump())
+        await future
+
+    async def pump(self) -> None:
+        # Hands out the global tokens, the most urgent waiter gets the next one.
+        while self.waiters:
+            if (delay := self.bucket.delay(time.monotonic())) > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self.waiters)
+            if future.done():
+                continue
+            self.bucket.tokens -= 1
+            future.set_result(None)
+
+    def pause(self, chat_id: int | str, seconds: float) -> None:
+        self.chat(chat_id).pause(time.monotonic(), seconds)
+
+
+class OutboundMiddleware(BaseRequestMiddleware):
+    def __init__(self, scheduler: OutboundScheduler, max_retries: int = settings.OUTBOUND_MAX_RETRIES) -> None:
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        # Only messages to a chat count against Telegram's limits, answers to callback queries and the like do not.
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        priority = outbound_priority.get()
+        for attempt in itertools.count():
+            start_time = time.monotonic()
+            await self.scheduler.acquire(chat_id, priority)
+            OUTBOUND_QUEUE_TIME.labels(priority=PRIORITY_NAMES[priority]).observe(time.monotonic() - start_time)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                TELEGRAM_RETRY_AFTER.labels(priority=PRIORITY_NAMES[priority]).inc()
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning('%s to chat %s was throttled for %s s', method.__api_method__, chat_id, e.retry_after)
+                self.scheduler.pause(chat_id, e.retry_after)
+
+
+outbound_scheduler = OutboundScheduler()
+
+
+def get_outbound_scheduler() -> OutboundScheduler:
+    return outbound_scheduler
@@ -0,0 +1,75 @@
+import asyncio
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, Collection
+
+from prometheus_client import multiprocess
+
+
+async def drain_tasks(
+    tasks: Collection[asyncio.Task[Any]], timeout: float
+) -> tuple[set[asyncio.Task[Any]], set[asyncio.Task[Any]]]:
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        # Lets the cancelled tasks clean up, e.g. hand their messages back while the channel is still open.
+        await asyncio.wait(pending, timeout=1)
+    return done, pending
+
+
+class ProcessSupervisor:
+    def __init__(
+        self,
+        target: Callable[..., None],
+        name: str,
+        logger: logging.Logger,
+        metrics_dir: str,
+        start_timeout: float,
+        drain_timeout: float,
+    ) -> None:
+        self.target = target
+        self.name = name
+        self.logger = logger
+        self.metrics_dir = metrics_dir
+        self.start_timeout = start_timeout
+        self.drain_timeout = drain_timeout
+        # Spawned processes start from scratch, so each of them opens its own pools and caches.
+        self.context = multiprocessing.get_context('spawn')
+
+    def setup_metrics(self) -> None:
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        # Gauges of the previous run are stale, its counters and histograms stay, among them the drain of its processes.
+        for path in glob.glob(os.path.join(self.metrics_dir, 'gauge_*.db')):
+            os.remove(path)
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = self.metrics_dir
+
+    def spawn(self, *args: Any) -> BaseProcess:
+        # The target gets an event after its own arguments and sets it once it is ready to work.
+        ready = self.context.Event()
+        child = self.context.Process(target=self.target, args=(*args, ready))
+        child.start()
+        deadline = time.monotonic() + self.start_timeout
+        while not ready.wait(0.1):
+            if not child.is_alive() or time.monotonic() > deadline:
+                self.logger.warning('%s %s did not start', self.name, child.pid)
+                break
+        return child
+
+    def stop(self, child: BaseProcess) -> None:
+        # SIGTERM makes the process finish its in-flight work first.
+        child.terminate()
+        child.join(self.drain_timeout + 5)
+        if child.is_alive():
+            self.logger.warning('%s %s did not drain in time, killing it', self.name, child.pid)
+            child.kill()
+            child.join()
+        self.reap(child)
+
+    def reap(self, child: BaseProcess) -> None:
+        multiprocess.mark_process_dead(child.pid, self.metrics_dir)
+        child.close()
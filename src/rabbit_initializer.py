@@ -1,5 +1,6 @@
 from aio_pika import ExchangeType
 
+from config.settings import settings
 from db.storage.rabbit import channel_pool
 
 
@@ -8,3 +9,7 @@ async def init_rabbitmq():
         exchange = await channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
         queue = await channel.declare_queue('user_messages', durable=True)
         await queue.bind(exchange, 'user_messages')
+
+        for queue_name in (settings.GRADING_JOBS_QUEUE, settings.GRADING_RESULTS_QUEUE):
+            queue = await channel.declare_queue(queue_name, durable=True)
+            await queue.bind(exchange, queue_name)
@@ -0,0 +1,111 @@
+import asyncio
+import time
+import uuid
+from functools import partial
+
+import aio_pika
+import msgpack
+from aio_pika import ExchangeType
+from aio_pika.abc import AbstractChannel, AbstractExchange, AbstractIncomingMessage, AbstractQueue
+
+from config.settings import settings
+from consumer.schema.base import BaseMessage
+from db.storage.rabbit import connection_pool
+from src.cache import Coalescer
+from src.logger import logger
+from src.metrics_init import RABBITMQ_MESSAGES_CONSUMED, RABBITMQ_MESSAGES_PRODUCED, RPC_REQUESTS
+
+
+class RpcClient:
+    def __init__(self, timeout: float = settings.RPC_TIMEOUT) -> None:
+        self.timeout = timeout
+        self.channel: AbstractChannel | None = None
+        self.exchange: AbstractExchange | None = None
+        self.queue: AbstractQueue | None = None
+        self.futures: dict[str, asyncio.Future[dict]] = {}
+        self.coalescer: Coalescer[dict] = Coalescer(RPC_REQUESTS, 'sent')
+
+    async def start(self) -> None:
+        async with connection_pool.acquire() as connection:
+            self.channel = await connection.channel()
+        self.exchange = await self.channel.declare_exchange('user_tasks', ExchangeType.TOPIC, durable=True)
+        # Named by the client, a robust channel has to redeclare the queue under the same name after a reconnect.
+        self.queue = await self.channel.declare_queue(
+            f'{settings.RPC_REPLY_QUEUE_PREFIX}.{uuid.uuid4().hex}', exclusive=True, auto_delete=True
+        )
+        await self.queue.bind(self.exchange, self.queue.name)
+        await self.queue.consume(self.on_reply, no_ack=True)
+
+    async def close(self) -> None:
+        for task in self.coalescer.inflight.values():
+            task.cancel()
+        for future in self.futures.values():
+            future.cancel()
+        if self.channel is not None:
+            await self.channel.close()
+
+    async def on_reply(self, message: AbstractIncomingMessage) -> None:
+        future = self.futures.pop(message.correlation_id, None)
+        if future is None or future.done():
+            logger.warning('Dropping a late or unknown reply %s', message.correlation_id)
+            return
+        RABBITMQ_MESSAGES_CONSUMED.inc()
+        future.set_result(msgpack.unpackb(message.body))
+
+    async def call(
+        self,
+        request: BaseMessage,
+        routing_key: str = 'user_messages',
+        timeout: float | None = None,
+        coalesce_key: str | None = None,
+    ) -> dict:
+        # Identical concurrent requests share the first one's reply instead of asking the consumer again.
+        if coalesce_key is None:
+            RPC_REQUESTS.labels(result='sent').inc()
+            return await self.request(request, routing_key, timeout)
+
+        return await self.coalescer.run(coalesce_key, partial(self.request, request, routing_key, timeout))
+
+    async def request(self, request: BaseMessage, routing_key: str, timeout: float | None) -> dict:
+        correlation_id = str(uuid.uuid4())
+        future = asyncio.get_running_loop().create_future()
+        self.futures[correlation_id] = future
+        try:
+            RABBITMQ_MESSAGES_PRODUCED.inc()
+            await self.exchange.publish(
+                aio_pika.Message(
+                    msgpack.packb(request),
+                    correlation_id=correlation_id,
+                    reply_to=self.queue.name,
+                    headers={'published_at': time.time()},
+                ),
+                routing_key,
+            )
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        finally:
+            self.futures.pop(correlation_id, None)
+
+
+rpc: RpcClient | None = None
+
+
+async def setup_rpc() -> RpcClient:
+    global rpc
+
+    rpc = RpcClient()
+    await rpc.start()
+    return rpc
+
+
+def get_rpc() -> RpcClient:
+    global rpc
+
+    return rpc
+
+
+async def close_rpc() -> None:
+    global rpc
+
+    if rpc is not None:
+        await rpc.close()
+        rpc = None
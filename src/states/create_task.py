@@ -12,3 +12,5 @@ class CreateTaskState(StatesGroup):
     waiting_for_input_test = State()
     waiting_for_secret_test_count = State()
     waiting_for_secret_test = State()
+    waiting_for_time_limit = State()
+    waiting_for_memory_limit = State()
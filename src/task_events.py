@@ -0,0 +1,11 @@
+from consumer.schema.task import TaskEventMessage
+from src.catalog import catalog_cache, task_key, tasks_key
+from src.grading.suite import suite_cache
+from src.logger import logger
+
+
+async def handle_task_event(event: TaskEventMessage) -> None:
+    logger.info('Task %s was %s, dropping cached data', event['task_id'], event['action'])
+    suite_cache.invalidate(event['task_id'])
+    await catalog_cache.invalidate(tasks_key(event['complexity']), task_key(event['task_id']))
+
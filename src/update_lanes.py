@@ -0,0 +1,98 @@
+import asyncio
+from functools import partial
+from typing import Any, Awaitable, Callable
+
+from config.settings import settings
+from src.bg_task import background_tasks
+from src.logger import logger
+from src.metrics_init import UPDATE_LANES, UPDATES_IN_FLIGHT, UPDATES_REJECTED
+
+
+def chat_key(update: dict[str, Any]) -> int | None:
+    # The first object of an update is the event: a message, a callback query with its message, etc.
+    for event in update.values():
+        if not isinstance(event, dict):
+            continue
+        if (chat := event.get('chat') or (event.get('message') or {}).get('chat')) is not None:
+            return chat['id']
+        if (user := event.get('from')) is not None:
+            return user['id']
+    return None
+
+
+class UpdateLanes:
+    def __init__(
+        self,
+        concurrency: int = settings.UPDATE_CONCURRENCY,
+        max_pending: int = settings.UPDATE_MAX_PENDING,
+        admit_timeout: float = settings.UPDATE_ADMIT_TIMEOUT,
+        max_pending_per_chat: int = settings.UPDATE_MAX_PENDING_PER_CHAT,
+    ) -> None:
+        self.running = asyncio.Semaphore(concurrency)
+        self.pending = asyncio.Semaphore(max_pending)
+        self.admit_timeout = admit_timeout
+        self.max_pending_per_chat = max_pending_per_chat
+        self.chat_pending: dict[int, int] = {}
+        # The last accepted update of every chat, the next one from that chat starts after it.
+        self.lanes: dict[int, asyncio.Task[None]] = {}
+        self.draining = False
+
+    async def submit(self, key: int | None, handler: Callable[[], Awaitable[Any]]) -> bool:
+        # One flooding chat is pushed back on its own before it can take the room of every other chat.
+        if key is not None:
+            if (count := self.chat_pending.get(key, 0)) >= self.max_pending_per_chat:
+                UPDATES_REJECTED.labels(reason='chat').inc()
+                return False
+            self.chat_pending[key] = count + 1
+        try:
+            await asyncio.wait_for(self.pending.acquire(), self.admit_timeout)
+        except asyncio.TimeoutError:
+            if key is not None:
+                self.release_chat(key)
+            UPDATES_REJECTED.labels(reason='total').inc()
+            return False
+        except asyncio.CancelledError:
+            if key is not None:
+                self.release_chat(key)
+            raise
+        UPDATES_IN_FLIGHT.inc()
+        previous = None if key is None else self.lanes.get(key)
+        task = asyncio.create_task(self.run(handler, previous))
+        background_tasks.add(task)
+        task.add_done_callback(partial(self.done, key))
+        if key is not None:
+            self.lanes[key] = task
+            UPDATE_LANES.set(len(self.lanes))
+        return True
+
+    async def run(self, handler: Callable[[], Awaitable[Any]], previous: asyncio.Task[None] | None) -> None:
+        if previous is not None:
+            await asyncio.wait((previous,))
+        async with self.running:
+            await handler()
+
+    def close(self) -> None:
+        self.draining = True
+
+    def release_chat(self, key: int) -> None:
+        if (count := self.chat_pending.pop(key) - 1) > 0:
+            self.chat_pending[key] = count
+
+    def done(self, key: int | None, task: asyncio.Task[None]) -> None:
+        background_tasks.discard(task)
+        self.pending.release()
+        UPDATES_IN_FLIGHT.dec()
+        if key is not None:
+            self.release_chat(key)
+            if self.lanes.get(key) is task:
+                del self.lanes[key]
+                UPDATE_LANES.set(len(self.lanes))
+        if not task.cancelled() and (e := task.exception()) is not None:
+            logger.error('Update was not processed', exc_info=e)
+
+
+update_lanes = UpdateLanes()
+
+
+def get_update_lanes() -> UpdateLanes:
+    return update_lanes
@@ -1,16 +1,35 @@
 import ast
 import asyncio
-import json
 import logging
 import os
 import re
 import subprocess
 import uuid
+from contextlib import aclosing
 from datetime import datetime
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable
 
+from config.settings import settings
 from consumer.logger import LOGGING_CONFIG, logger
-from db.model.task import Task
-from src.metrics_init import measure_time
+from src.grading.cache import result_cache
+from src.grading.harness import MEMORY_LIMIT_ERROR, OUTPUT_LIMIT_ERROR, TIME_LIMIT_ERROR
+from src.grading.pool import get_pool
+from src.grading.runner import (
+    CaseResult,
+    Limits,
+    OutputLimitExceeded,
+    protocol_limit,
+    read_limited,
+    run_user_tests,
+    set_rlimits,
+    stop_process,
+)
+from src.grading.scheduler import get_scheduler
+from src.grading.shards import run_sharded
+from src.grading.suite import TaskSuite
+from src.grading.supervisor import run_in_supervisor
+from src.metrics_init import SANDBOX_CASE_CPU_SECONDS, SANDBOX_CASE_MAX_RSS, measure_time
 
 logging.config.dictConfig(LOGGING_CONFIG)
 
@@ -57,8 +76,9 @@ async def run_user_function(
     test_args: tuple,
     restricted_dir='/env/restricted_dir',
     username='limiteduser',
-    timeout=3,
-) -> str:
+    limits=Limits(),
+    output_limit=settings.SANDBOX_OUTPUT_LIMIT,
+) -> tuple[str, str]:
     test_code = f"""
 {user_code}
 
@@ -78,69 +98,168 @@ print(result)
     subprocess.run(['sudo', 'chmod', '500', script_path], check=True)
 
     proc = await asyncio.create_subprocess_exec(
-        'sudo', '-u', username, 'env', 'python3', script_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-    )
+        'sudo', '-u', username, 'env', 'python3', script_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        preexec_fn=partial(set_rlimits, limits),
+        start_new_session=True,
+    )  # fmt: skip
 
     try:
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        stdout, stderr, returncode = await asyncio.wait_for(
+            asyncio.gather(
+                read_limited(proc.stdout, output_limit), read_limited(proc.stderr, output_limit), proc.wait()
+            ),
+            limits.time,
+        )
     except asyncio.TimeoutError:
-        proc.kill()
-        logger.info("user's code is running more than 3 seconds")
-        return 'Execution timed out', f'Process was killed after {timeout} seconds.'
-    except Exception as e: # noqa
-        logger.error(e)
-
-    if os.path.exists(script_path):
-        os.remove(script_path)
+        logger.info("user's code is running more than %s seconds", limits.time)
+        return 'Execution timed out', f'Process was killed after {limits.time} seconds.'
+    except OutputLimitExceeded:
+        logger.info("user's code exceeded the output limit of %s bytes", output_limit)
+        return '', OUTPUT_LIMIT_ERROR
+    finally:
+        await stop_process(proc, username)
+        if os.path.exists(script_path):
+            os.remove(script_path)
 
+    if returncode < 0 and not stderr:
+        # Killed by a signal before it could report anything, the CPU limit sends SIGXCPU and then SIGKILL.
+        logger.info("user's code was killed by signal %s", -returncode)
+        return '', TIME_LIMIT_ERROR
     return stdout.decode().strip(), stderr.decode().strip()
 
 
+async def run_user_tests_one_by_one(
+    user_code: str, func_name: str, tests: list[tuple], limits: Limits
+) -> AsyncIterator[CaseResult]:
+    for index, test_args in enumerate(tests):
+        result, err = await run_user_function(user_code, func_name, test_args, limits=limits)
+        yield CaseResult(index, result, err, transient=result == 'Execution timed out')
+        if err:
+            return
+
+
+def run_tests_locally(user_code: str, func_name: str, tests: list[tuple], limits: Limits) -> AsyncIterator[CaseResult]:
+    if (pool := get_pool()) is not None:
+        return pool.run(user_code, func_name, tests, limits)
+    if settings.SANDBOX_BATCH_MODE:
+        return run_user_tests(user_code, func_name, tests, limits=limits)
+    return run_user_tests_one_by_one(user_code, func_name, tests, limits)
+
+
+async def run_tests(user_code: str, func_name: str, tests: list[tuple], limits: Limits) -> AsyncIterator[CaseResult]:
+    cases = None
+    if settings.SANDBOX_SUPERVISOR_SOCKET:
+        try:
+            reader, writer = await asyncio.open_unix_connection(
+                settings.SANDBOX_SUPERVISOR_SOCKET, limit=protocol_limit(settings.SANDBOX_OUTPUT_LIMIT)
+            )
+        except OSError as e:
+            logger.warning('Sandbox supervisor is unavailable (%s), running tests locally', e)
+        else:
+            cases = run_in_supervisor(reader, writer, user_code, func_name, tests, limits)
+
+    async with aclosing(cases or run_tests_locally(user_code, func_name, tests, limits)) as cases:
+        async for case in cases:
+            if case.max_rss_kb:
+                SANDBOX_CASE_CPU_SECONDS.observe(case.cpu_time)
+                SANDBOX_CASE_MAX_RSS.observe(case.max_rss_kb * 1024)
+            yield case
+
+
 @measure_time
-async def check_user_task_solution(user_code: str, task: Task) -> str:
+async def check_user_task_solution(
+    user_code: str,
+    suite: TaskSuite | None,
+    user_id: int = 0,
+    on_queued: Callable[[int, float], Awaitable[None]] | None = None,
+) -> str:
     func_name = extract_function_name(user_code)
     if not func_name:
         return 'Ошибка: Функция не найдена в коде.'
 
-    input_data = json.loads(task.get('input_data'))
-    correct_answers = json.loads(task.get('correct_answer'))
-
-    if input_data is None or correct_answers is None:
-        logger.error(
-            '[%s] Not exist input data or correct answers!!! TASK ID: %s\n USER ANSWER: %s',  # Исправлено
-            datetime.now(), task.get('id'), user_code
-        )
+    if suite is None:
+        logger.error('[%s] No test suite for the task!!!\n USER ANSWER: %s', datetime.now(), user_code)
         return 'Технические шоколадки. Попробуйте позже!'
 
-    for test_count, (test_args, expected_output) in enumerate(zip(input_data, correct_answers), start=1):
-        result, err = await run_user_function(user_code, func_name, tuple(test_args))
-        if err:
-            cleaned_message = clean_error_message(err)
-            return f'<b>Ваш код выдал ошибку</b>:\n{cleaned_message}'
-        elif str(result) != str(expected_output):
-            return (
-                f'Решение неверное!❌\nТест №{test_count}:\nАргументы: {", ".join(str(arg) for arg in test_args)}\n'
-                f'Правильный ответ: {expected_output}.\nВаш ответ: {result}'
-            )
-
-    secret_input = json.loads(task.get('secret_input'))
-    secret_answers = json.loads(task.get('secret_answer'))
+    cache_key = None if suite.secret_missing else result_cache.key(suite, user_code)
+    if (verdict := await result_cache.get(cache_key)) is not None:
+        return verdict
 
-    if secret_answers is None or secret_input is None:
+    scheduler = get_scheduler()
+    if on_queued is not None and (position := scheduler.position(user_id)):
+        await on_queued(position, scheduler.estimated_wait(user_id))
+    verdict, cacheable, usage = await judge_solution(user_code, func_name, suite, user_id)
+    if verdict is None:
         logger.error(
             '[%s] Not exist secret answers or secret input!!! TASK ID: %s\n USER ANSWER: %s',  # Исправлено
-            datetime.now(), task.get('id'), user_code
+            datetime.now(), suite.task_id, user_code
         )
         return 'Технические шоколадки. Попробуйте позже!'
 
-    for test_count, (test_args, expected_output_secret) in enumerate(
-        zip(secret_input, secret_answers), start=len(input_data) + 1
-    ):
-        result_secret, err = await run_user_function(user_code, func_name, tuple(test_args))
-        if err:
-            cleaned_message = clean_error_message(err)
-            return f'<b>Ваш код выдал ошибку</b>:\n{cleaned_message}'
-        elif str(result_secret) != str(expected_output_secret):
-            return f'Решение неверное ❌\nТест №{test_count}: Попробуйте еще раз!'
+    if cacheable:
+        # Usage figures belong to this run only, a later identical submission gets the bare verdict.
+        await result_cache.set(cache_key, verdict)
+    return verdict + usage
+
 
-    return 'Решение верное! Поздравляю! Вы прошли 100% тестов! 🎉'
+async def judge_solution(
+    user_code: str, func_name: str, suite: TaskSuite, user_id: int
+) -> tuple[str | None, bool, str]:
+    tests, limits = suite.tests, suite.limits
+    cpu_time, max_rss_kb = 0.0, 0
+
+    async def run_shard(shard_tests: list[tuple]) -> AsyncIterator[CaseResult]:
+        async with get_scheduler().slot(user_id):
+            async with aclosing(run_tests(user_code, func_name, shard_tests, limits)) as cases:
+                async for case in cases:
+                    yield case
+
+    shards = min(settings.GRADING_SHARDS, len(tests) // settings.GRADING_MIN_SHARD_SIZE)
+    if shards > 1:
+        cases = run_sharded(run_shard, tests, shards, lambda case: judge_case(case, suite) is not None)
+    else:
+        cases = run_shard(tests)
+
+    async with aclosing(cases) as cases:
+        async for case in cases:
+            cpu_time, max_rss_kb = max(cpu_time, case.cpu_time), max(max_rss_kb, case.max_rss_kb)
+            if (failure := judge_case(case, suite)) is not None:
+                return *failure, ''
+
+    if suite.secret_missing:
+        return None, False, ''
+
+    usage = ''
+    if max_rss_kb:
+        usage = f'\nВремя: до {cpu_time * 1000:.0f} мс на тест, память: {max_rss_kb / 1024:.1f} МБ.'
+    return 'Решение верное! Поздравляю! Вы прошли 100% тестов! 🎉', True, usage
+
+
+def judge_case(case: CaseResult, suite: TaskSuite) -> tuple[str, bool] | None:
+    tests, expected, limits = suite.tests, suite.expected, suite.limits
+    if case.error == OUTPUT_LIMIT_ERROR:
+        return (
+            'Решение неверное ❌\nПревышен лимит вывода: '
+            f'программа напечатала больше {settings.SANDBOX_OUTPUT_LIMIT // 1024} КБ.'
+        ), True
+    elif case.error == TIME_LIMIT_ERROR or case.output == 'Execution timed out':
+        # Running time depends on the host load, so the verdict is not cached.
+        return f'Решение неверное ❌\nПревышен лимит времени: {limits.time:g} с на тест.', False
+    elif case.error == MEMORY_LIMIT_ERROR:
+        return f'Решение неверное ❌\nПревышен лимит памяти: {limits.memory_mb} МБ.', True
+    elif case.error:
+        cleaned_message = clean_error_message(case.error)
+        return f'<b>Ваш код выдал ошибку</b>:\n{cleaned_message}', not case.transient
+    elif str(case.output) == expected[case.index]:
+        return None
+    elif case.index < suite.public_count:
+        return (
+            f'Решение неверное!❌\nТест №{case.index + 1}:\n'
+            f'Аргументы: {", ".join(str(arg) for arg in tests[case.index])}\n'
+            f'Правильный ответ: {expected[case.index]}.\nВаш ответ: {case.output}'
+        ), True
+    else:
+        test_count = suite.secret_start + 1 + case.index - suite.public_count
+        return f'Решение неверное ❌\nТест №{test_count}: Попробуйте еще раз!', True
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.bg_task import background_tasks, drain_background_tasks
+
+
+def drained() -> float:
+    return REGISTRY.get_sample_value('shutdown_drain_duration_seconds_count')
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_finished_tasks():
+    before = drained()
+    results = []
+
+    async def handle(delay: float):
+        await asyncio.sleep(delay)
+        results.append(delay)
+
+    tasks = [asyncio.create_task(handle(delay)) for delay in (0.01, 0.02)]
+    background_tasks.update(tasks)
+    await drain_background_tasks(timeout=1)
+    background_tasks.difference_update(tasks)
+
+    assert results == [0.01, 0.02]
+    assert drained() == before + 1
+
+
+@pytest.mark.asyncio
+async def test_drain_cancels_tasks_at_the_deadline():
+    before = drained()
+    finished = asyncio.create_task(asyncio.sleep(0))
+    hung = asyncio.create_task(asyncio.Event().wait())
+    background_tasks.update((finished, hung))
+
+    start_time = asyncio.get_running_loop().time()
+    await drain_background_tasks(timeout=0.05)
+    background_tasks.difference_update((finished, hung))
+
+    assert asyncio.get_running_loop().time() - start_time < 1
+    assert finished.done() and not finished.cancelled()
+    assert hung.cancelled()
+    assert drained() == before + 1
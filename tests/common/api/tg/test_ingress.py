@@ -0,0 +1,48 @@
+import asyncio
+
+import orjson
+import pytest
+from starlette.responses import Response
+
+from src.ingress import Ingress, jump_hash
+
+
+def test_jump_hash_moves_few_keys():
+    keys = range(-5000, 5000)
+    before = [jump_hash(key, 4) for key in keys]
+    after = [jump_hash(key, 5) for key in keys]
+    assert set(before) == {0, 1, 2, 3}
+    # A key either stays or moves to the new worker.
+    moved = [new for old, new in zip(before, after) if old != new]
+    assert set(moved) == {4}
+    assert 0.15 < len(moved) / len(before) < 0.25
+
+
+@pytest.mark.asyncio
+async def test_ingress_forwards_chat_in_order(mocker):
+    ingress = Ingress(workers=3)
+    gate = asyncio.Event()
+    sent = []
+
+    async def post(index: int, body: bytes) -> Response:
+        update = orjson.loads(body)
+        sent.append((index, update['update_id']))
+        if update['update_id'] == 1:
+            await gate.wait()
+        return Response(status_code=200)
+
+    mocker.patch.object(ingress, 'post', post)
+
+    def update(update_id: int, chat_id: int) -> bytes:
+        return orjson.dumps({'update_id': update_id, 'message': {'chat': {'id': chat_id}}})
+
+    first = asyncio.create_task(ingress.forward(update(1, 10)))
+    second = asyncio.create_task(ingress.forward(update(2, 10)))
+    await asyncio.sleep(0.01)
+    # The second update of the chat waits until the worker has accepted the first one.
+    assert sent == [(ingress.shard(10), 1)]
+
+    gate.set()
+    await asyncio.gather(first, second)
+    assert sent == [(ingress.shard(10), 1), (ingress.shard(10), 2)]
+    assert ingress.tails == {}
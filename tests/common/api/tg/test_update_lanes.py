@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from src.update_lanes import UpdateLanes, chat_key
+
+
+def test_chat_key():
+    assert chat_key({'update_id': 1, 'message': {'chat': {'id': 10}, 'from': {'id': 20}}}) == 10
+    assert chat_key({'update_id': 2, 'callback_query': {'from': {'id': 20}, 'message': {'chat': {'id': 10}}}}) == 10
+    assert chat_key({'update_id': 3, 'inline_query': {'from': {'id': 20}}}) == 20
+    assert chat_key({'update_id': 4}) is None
+
+
+@pytest.mark.asyncio
+async def test_update_lanes_order_chats_and_push_back():
+    lanes = UpdateLanes(concurrency=2, max_pending=3, admit_timeout=0.01)
+    gate = asyncio.Event()
+    events = []
+
+    async def handle(name: str):
+        events.append(name)
+        await gate.wait()
+
+    assert await lanes.submit(1, lambda: handle('first'))
+    assert await lanes.submit(1, lambda: handle('second'))
+    assert await lanes.submit(2, lambda: handle('other'))
+    await asyncio.sleep(0)
+    # The other chat runs at once, the same chat waits for its earlier update.
+    assert events == ['first', 'other']
+    assert not await lanes.submit(3, lambda: handle('rejected'))
+
+    gate.set()
+    await asyncio.sleep(0.01)
+    assert events == ['first', 'other', 'second']
+    assert not lanes.lanes
+
+
+@pytest.mark.asyncio
+async def test_update_lanes_cap_pending_per_chat():
+    lanes = UpdateLanes(concurrency=2, max_pending=10, admit_timeout=0.01, max_pending_per_chat=2)
+    gate = asyncio.Event()
+
+    async def handle():
+        await gate.wait()
+
+    assert await lanes.submit(1, handle)
+    assert await lanes.submit(1, handle)
+    # The flooding chat is pushed back, the others still get in.
+    assert not await lanes.submit(1, handle)
+    assert await lanes.submit(2, handle)
+
+    gate.set()
+    await asyncio.sleep(0.01)
+    assert not lanes.chat_pending
+    assert await lanes.submit(1, handle)
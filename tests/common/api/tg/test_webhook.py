@@ -0,0 +1,29 @@
+import orjson
+import pytest
+
+from src.api.tg.tg import update_type, webhook
+
+
+class MockRequest:
+    def __init__(self, update: dict) -> None:
+        self.content = orjson.dumps(update)
+
+    async def body(self) -> bytes:
+        return self.content
+
+
+@pytest.mark.asyncio
+async def test_webhook_drops_unhandled_updates(mocker):
+    mocker.patch('src.api.tg.tg.get_used_update_types', return_value=frozenset({'message'}))
+    lanes = mocker.patch('src.api.tg.tg.get_update_lanes').return_value
+    lanes.draining = False
+    lanes.submit = mocker.AsyncMock(return_value=True)
+    member = {'update_id': 1, 'my_chat_member': {'chat': {'id': 10}}}
+    message = {'update_id': 2, 'message': {'chat': {'id': 10}}}
+    assert update_type(member) == 'my_chat_member'
+
+    assert (await webhook(MockRequest(member))).status_code == 200
+    lanes.submit.assert_not_called()
+
+    assert (await webhook(MockRequest(message))).status_code == 200
+    assert lanes.submit.call_args.args[0] == 10
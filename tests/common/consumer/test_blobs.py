@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+import msgpack
+import pytest
+
+from consumer.blobs import CatalogBlobs
+from db.model.task import Task
+
+
+def make_task(title: str) -> Task:
+    return Task(id=uuid4(), title=title, complexity='easy', description='', time_limit=None, memory_limit_mb=None)
+
+
+@pytest.mark.asyncio
+async def test_catalog_pages_are_dropped_after_changes():
+    blobs = CatalogBlobs()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return msgpack.packb({'page': {'items': [{'id': '1', 'title': 'Sum'}], 'has_next': False, 'has_prev': False}})
+
+    first = await blobs.page('easy', (None, 'next', 4), load)
+    assert await blobs.page('easy', (None, 'next', 4), load) is first
+    assert blobs.cached_page('easy', (None, 'next', 4)) is first
+    assert len(loads) == 1
+
+    task = make_task('Product')
+    blobs.add(task)
+    assert blobs.cached_page('easy', (None, 'next', 4)) is None
+    assert msgpack.unpackb(blobs.tasks[str(task.id)])['task']['title'] == 'Product'
+
+    await blobs.page('easy', (None, 'next', 4), load)
+    blobs.forget('easy', str(task.id))
+    assert blobs.cached_page('easy', (None, 'next', 4)) is None
+    assert str(task.id) not in blobs.tasks
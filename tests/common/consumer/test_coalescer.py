@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+from consumer.metrics_init import COALESCED_QUERIES
+from src.cache import Coalescer
+
+
+@pytest.mark.asyncio
+async def test_coalescer_shares_one_fetch():
+    fetched = []
+
+    async def fetch():
+        fetched.append(1)
+        return b'tasks'
+
+    coalescer = Coalescer(COALESCED_QUERIES, 'fetched')
+    results = await asyncio.gather(*(coalescer.run('tasks', fetch) for _ in range(5)))
+
+    assert results == [b'tasks'] * 5
+    assert len(fetched) == 1
+    assert not coalescer.inflight
+    # A query that arrives after the fetch finished starts a new one.
+    await coalescer.run('tasks', fetch)
+    assert len(fetched) == 2
@@ -0,0 +1,59 @@
+import asyncio
+import signal
+import sys
+import time
+
+import msgpack
+import pytest
+
+from consumer.app import Consumer, process
+from consumer.supervisor import Supervisor
+from tests.mocking.rabbit import MockMessage
+
+
+def drain_on_sigterm(ready) -> None:
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    ready.set()
+    while True:
+        time.sleep(0.1)
+
+
+def test_supervisor_restarts_processes_one_by_one(tmp_path):
+    supervisor = Supervisor(processes=2, drain_timeout=1, metrics_dir=str(tmp_path), target=drain_on_sigterm)
+    exitcodes = []
+    reap = supervisor.reap
+    supervisor.reap = lambda child: exitcodes.append(child.exitcode) or reap(child)
+    supervisor.children = [supervisor.spawn() for _ in range(supervisor.processes)]
+    old = [child.pid for child in supervisor.children]
+    assert all(child.is_alive() for child in supervisor.children)
+
+    supervisor.restart()
+
+    assert set(old).isdisjoint(child.pid for child in supervisor.children)
+    assert all(child.is_alive() for child in supervisor.children)
+    # The replaced processes were asked to drain and exited on their own, none was killed.
+    assert exitcodes == [0, 0]
+    for child in supervisor.children:
+        supervisor.stop(child)
+
+
+@pytest.mark.asyncio
+async def test_consumer_requeues_messages_cancelled_on_drain(mocker):
+    started = asyncio.Event()
+
+    async def handle_task(body, reply_to):
+        started.set()
+        await asyncio.sleep(10)
+
+    mocker.patch('consumer.app.handle_task', handle_task)
+    consumer = Consumer(concurrency=2)
+    slow, failing = MockMessage(b'', 'slow'), MockMessage(b'', 'failing')
+    await consumer.workers.submit(None, lambda: process(slow, {'event': 'tasks', 'action': 'get_task_page'}))
+    await consumer.workers.submit(None, lambda: process(failing, msgpack.unpackb(msgpack.packb({}))))
+    await started.wait()
+
+    await consumer.drain(timeout=0.05)
+
+    assert slow.requeued is True
+    # A broken body fails the same way every time, it is not requeued.
+    assert failing.requeued is False
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from consumer.workers import WorkerPool
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_keeps_order_per_key():
+    workers = WorkerPool(concurrency=4)
+    events = []
+
+    async def handle(key: int, n: int, delay: float):
+        events.append(('start', key, n))
+        await asyncio.sleep(delay)
+        events.append(('end', key, n))
+
+    await workers.submit(1, lambda: handle(1, 0, 0.05))
+    await workers.submit(1, lambda: handle(1, 1, 0))
+    await workers.submit(2, lambda: handle(2, 0, 0))
+    await workers.join()
+
+    # The other key does not wait for the slow handler, the same key does.
+    assert events.index(('end', 2, 0)) < events.index(('end', 1, 0))
+    assert events.index(('end', 1, 0)) < events.index(('start', 1, 1))
+    assert not workers.tails
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_bounds_concurrency():
+    workers = WorkerPool(concurrency=2)
+    running = []
+    peak = 0
+
+    async def handle():
+        nonlocal peak
+        running.append(1)
+        peak = max(peak, len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    for _ in range(6):
+        await workers.submit(None, handle)
+    await workers.join()
+    assert peak == 2
@@ -0,0 +1,67 @@
+import asyncio
+from dataclasses import dataclass, field
+
+import msgpack
+import pytest
+
+from grader.app import Grader
+
+
+@dataclass
+class GradingMessage:
+    body: bytes
+    correlation_id: str = 'grading'
+    processed: bool = False
+    outcomes: list = field(default_factory=list)
+
+    async def ack(self) -> None:
+        self.processed = True
+        self.outcomes.append('ack')
+
+    async def reject(self, requeue: bool = False) -> None:
+        self.processed = True
+        self.outcomes.append('requeue' if requeue else 'reject')
+
+
+def job() -> bytes:
+    return msgpack.packb({'user_id': 1, 'chat_id': 1, 'task_id': 't', 'code': 'def f(): ...'})
+
+
+@pytest.mark.asyncio
+async def test_grader_acks_done_jobs_and_drops_poison_ones(mocker):
+    handle_grading = mocker.patch('grader.app.handle_grading')
+    grader = Grader(concurrency=2)
+
+    done, malformed, failing = GradingMessage(job()), GradingMessage(b'\xc1'), GradingMessage(job())
+    await grader.on_message(done)
+    await grader.on_message(malformed)
+    handle_grading.side_effect = KeyError('task_id')
+    await grader.on_message(failing)
+
+    assert done.outcomes == ['ack']
+    # Neither would ever succeed, they must not come back.
+    assert malformed.outcomes == ['reject']
+    assert failing.outcomes == ['reject']
+    assert not grader.in_flight
+
+
+@pytest.mark.asyncio
+async def test_grader_requeues_jobs_cancelled_on_drain(mocker):
+    started = asyncio.Event()
+
+    async def handle_grading(body):
+        started.set()
+        await asyncio.sleep(10)
+
+    mocker.patch('grader.app.handle_grading', handle_grading)
+    grader = Grader(concurrency=1)
+    running, waiting = GradingMessage(job()), GradingMessage(job())
+    tasks = [asyncio.create_task(grader.on_message(message)) for message in (running, waiting)]
+    await started.wait()
+
+    await grader.drain(timeout=0.05)
+
+    assert all(task.cancelled() for task in tasks)
+    assert running.outcomes == ['requeue']
+    assert waiting.outcomes == ['requeue']
+    assert grader.stopped.is_set()
@@ -0,0 +1,41 @@
+import pytest
+
+from src.cache import LocalCache
+from src.grading.cache import code_fingerprint, result_cache
+from src.grading.runner import CaseResult
+from src.grading.scheduler import GradingScheduler
+from src.grading.suite import TaskSuite
+from src.utils import check_user_task_solution
+
+
+def test_fingerprint_ignores_formatting_and_comments():
+    first = 'def f(a, b):\n    return a + b\n'
+    second = '# sum\ndef f(a,b):\n\n    return a+b  # result\n'
+
+    assert code_fingerprint(first) == code_fingerprint(second)
+    assert code_fingerprint(first) != code_fingerprint('def f(a, b):\n    return b + a\n')
+    assert code_fingerprint('def f(:') is None
+
+
+@pytest.mark.asyncio
+async def test_cached_verdict_skips_the_queue_and_the_usage_of_the_first_run(mocker):
+    async def run_tests(user_code, func_name, tests, limits):
+        yield CaseResult(0, '3', '', cpu_time=0.012, max_rss_kb=10240)
+
+    mocker.patch('src.utils.run_tests', run_tests)
+    mocker.patch('src.grading.cache.get_redis', return_value=None)
+    mocker.patch.object(result_cache, 'local', LocalCache(maxsize=10, ttl=60))
+    suite = TaskSuite('task', 'easy', 'v1', ((1, 2),), ('3',), public_count=1, secret_start=1, secret_missing=False)
+    code = 'def f(a, b):\n    return a + b\n'
+
+    mocker.patch.object(GradingScheduler, 'position', return_value=2)
+    queued = []
+
+    async def on_queued(position, wait):
+        queued.append(position)
+
+    first = await check_user_task_solution(code, suite, on_queued=on_queued)
+    assert 'Время: до 12 мс' in first
+    # A later identical submission is not told someone else's timing, nor that it waits in the queue.
+    assert await check_user_task_solution(code, suite, on_queued=on_queued) == first.split('\n')[0]
+    assert queued == [2]
@@ -0,0 +1,85 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from src.grading.harness import MEMORY_LIMIT_ERROR, OUTPUT_LIMIT_ERROR, TIME_LIMIT_ERROR
+from src.grading.runner import HARNESS_SOURCE
+
+
+def run_harness(code: str, func_name: str, tests: list, output_limit: int = 64 * 1024, **limits) -> list[dict]:
+    job = {'code': code, 'func_name': func_name, 'tests': tests, 'output_limit': output_limit}
+    if limits:
+        job['limits'] = {'time': 3, 'memory_mb': 256, 'file_size_kb': 1024, 'processes': 0, **limits}
+    job = json.dumps(job)
+    proc = subprocess.run(
+        [sys.executable, '-I', '-c', HARNESS_SOURCE], input=job + '\n', capture_output=True, text=True, check=True
+    )
+    return [json.loads(line) for line in proc.stdout.splitlines()]
+
+
+@pytest.mark.parametrize(
+    ('code', 'tests', 'expected'),
+    [
+        ('def f(a, b):\n    return a + b\n', [[1, 2], [2, 3]], [('3', ''), ('5', '')]),
+        ('print("hi")\ndef f(a):\n    return a\n', [[1]], [('hi\n1', '')]),
+        (
+            'def f(a):\n    return 1 / a\n',
+            [[1], [0], [2]],
+            [('1.0', ''), ('', 'ZeroDivisionError: division by zero'), ('0.5', '')],
+        ),
+    ],
+)
+def test_harness_reports_every_case(code, tests, expected):
+    cases = run_harness(code, 'f', tests)
+
+    assert [case['index'] for case in cases] == list(range(len(tests)))
+    for case, (output, error) in zip(cases, expected):
+        assert case['output'] == output
+        assert case['error'].endswith(error)
+        assert 'harness' not in case['error']
+
+
+def test_harness_reports_syntax_error_once():
+    cases = run_harness('def f(a:\n    pass\n', 'f', [[1], [2]])
+
+    assert len(cases) == 1
+    assert 'SyntaxError' in cases[0]['error']
+
+
+@pytest.mark.parametrize(
+    'code',
+    [
+        'def f():\n    while True:\n        print("x" * 1000)\n',
+        'def f():\n    while True:\n        try:\n            print("x" * 1000)\n        except BaseException:\n            return 1\n',
+        'import sys\nsys.stderr.write("x" * 10**6)\ndef f():\n    return 1\n',
+    ],
+)
+def test_harness_caps_output(code):
+    cases = run_harness(code, 'f', [[]], output_limit=4096)
+
+    assert len(cases) == 1
+    assert cases[0]['error'] == OUTPUT_LIMIT_ERROR
+    assert len(cases[0]['output']) <= 4096
+
+
+@pytest.mark.parametrize(
+    ('code', 'limits', 'error'),
+    [
+        ('def f():\n    while True:\n        pass\n', {'time': 1}, TIME_LIMIT_ERROR),
+        ('def f():\n    return len(bytearray(10**9))\n', {'memory_mb': 128}, MEMORY_LIMIT_ERROR),
+    ],
+)
+def test_harness_enforces_resource_limits(code, limits, error):
+    cases = run_harness(code, 'f', [[], []], **limits)
+
+    assert [case['error'] for case in cases] == [error, error]
+
+
+def test_harness_reports_resource_usage():
+    cases = run_harness('def f():\n    return len(bytearray(32 * 1024 * 1024))\n', 'f', [[]], memory_mb=256)
+
+    assert cases[0]['output'] == str(32 * 1024 * 1024)
+    assert cases[0]['cpu_time'] >= 0
+    assert cases[0]['max_rss_kb'] >= 32 * 1024
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import pwd
+import tempfile
+
+import pytest
+
+from src.grading.pool import ZygotePool, ZygoteWorker
+from src.grading.runner import CaseResult, Limits
+
+
+def can_drop_privileges() -> bool:
+    try:
+        pwd.getpwnam('nobody')
+    except KeyError:
+        return False
+    return os.geteuid() == 0
+
+
+@pytest.fixture
+def sandbox_dir():
+    with tempfile.TemporaryDirectory() as directory:
+        os.chmod(directory, 0o755)
+        yield directory
+
+
+@pytest.mark.asyncio
+async def test_pool_gives_up_on_broken_zygotes_and_falls_back(mocker):
+    mocker.patch.object(ZygoteWorker, 'start', side_effect=OSError('sudo: unknown user limiteduser'))
+    one_shot = []
+
+    async def run_user_tests(user_code, func_name, tests, restricted_dir, username, limits):
+        one_shot.append(func_name)
+        yield CaseResult(0, '3', '')
+
+    mocker.patch('src.grading.pool.run_user_tests', run_user_tests)
+    pool = ZygotePool(size=2, max_spawn_failures=3, spawn_backoff=0, acquire_timeout=10)
+    await pool.start()
+    while pool.replacements:
+        await asyncio.sleep(0.01)
+    assert pool.spawn_failures >= 3
+    assert not pool.workers
+
+    # No zygote is coming, the job does not wait for the acquire timeout.
+    cases = await asyncio.wait_for(_collect(pool.run('def f(): return 3', 'f', [()])), 1)
+    assert [case.output for case in cases] == ['3']
+    assert one_shot == ['f']
+
+
+@pytest.mark.skipif(not can_drop_privileges(), reason='zygotes drop privileges only when started as root')
+@pytest.mark.asyncio
+async def test_pool_runs_jobs_and_stops_busy_workers_on_close(sandbox_dir):
+    pool = ZygotePool(size=1, username='nobody', restricted_dir=sandbox_dir)
+    await pool.start()
+    cases = await _collect(pool.run('def f(a, b):\n    return a + b\n', 'f', [(1, 2), (2, 3)]))
+    assert [case.output for case in cases] == ['3', '5']
+    [worker] = pool.workers
+    # The forked job is measured, not only the zygote.
+    assert worker.rss_kb >= max(case.max_rss_kb for case in cases)
+
+    endless = 'def f():\n    while True:\n        pass\n'
+    hung = asyncio.create_task(_collect(pool.run(endless, 'f', [()], Limits(time=30))))
+    while not pool.busy:
+        await asyncio.sleep(0.01)
+    await pool.close()
+    assert worker.proc.returncode is not None
+    assert (await hung)[0].transient
+    assert not pool.replacements
+
+
+async def _collect(cases) -> list[CaseResult]:
+    return [case async for case in cases]
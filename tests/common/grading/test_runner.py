@@ -0,0 +1,57 @@
+import asyncio
+import json
+import signal
+
+import pytest
+
+from src.grading.harness import OUTPUT_LIMIT_ERROR, TIME_LIMIT_ERROR
+from src.grading.runner import CaseResult, Limits, read_cases
+from src.utils import run_user_function
+
+
+def reader_of(*frames: dict, eof: bool = True) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader(limit=1024)
+    for frame in frames:
+        reader.feed_data(json.dumps(frame).encode() + b'\n')
+    if eof:
+        reader.feed_eof()
+    return reader
+
+
+async def read_all(reader: asyncio.StreamReader, tests: int, **kwargs) -> list[CaseResult]:
+    return [case async for case in read_cases(reader, [()] * tests, Limits(time=0.05), **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_read_cases_maps_the_end_of_a_job():
+    ok = {'index': 0, 'output': '3', 'error': ''}
+    cases = await read_all(reader_of(ok, eof=False), 2)
+    assert [case.output for case in cases] == ['3', 'Execution timed out']
+    assert cases[1].transient
+
+    exits = []
+
+    async def on_exit(frame: dict | None) -> str:
+        exits.append(frame)
+        return 'Killed'
+
+    cases = await read_all(reader_of(ok, {'done': True}), 3, on_exit=on_exit)
+    assert [(case.index, case.error) for case in cases] == [(0, ''), (1, 'Killed')]
+    cases = await read_all(reader_of(), 1, on_exit=on_exit)
+    assert [(case.index, case.error) for case in cases] == [(0, 'Killed')]
+    assert exits == [{'done': True}, None]
+
+    huge = {'index': 0, 'output': 'x' * 2048, 'error': ''}
+    [case] = await read_all(reader_of(huge), 1)
+    assert case.error == OUTPUT_LIMIT_ERROR
+
+
+@pytest.mark.asyncio
+async def test_run_user_function_reports_a_cpu_limit_kill_as_time_limit(mocker, tmp_path):
+    proc = mocker.Mock(stdout=reader_of(), stderr=reader_of(), returncode=-signal.SIGXCPU)
+    proc.wait = mocker.AsyncMock(return_value=-signal.SIGXCPU)
+    mocker.patch('src.utils.subprocess.run')
+    mocker.patch('src.utils.asyncio.create_subprocess_exec', mocker.AsyncMock(return_value=proc))
+
+    result = await run_user_function('def f():\n    pass', 'f', (), restricted_dir=str(tmp_path))
+    assert result == ('', TIME_LIMIT_ERROR)
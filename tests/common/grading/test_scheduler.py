@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from src.grading import scheduler as scheduler_module
+from src.grading.scheduler import GradingScheduler, get_scheduler, setup_scheduler
+
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_users_round_robin():
+    scheduler = GradingScheduler(capacity=1)
+    order = []
+    gate = asyncio.Event()
+
+    async def submit(user_id: int, name: str) -> None:
+        async with scheduler.slot(user_id):
+            order.append(name)
+            await gate.wait()
+
+    first = asyncio.create_task(submit(1, 'a1'))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(submit(user_id, name)) for user_id, name in [(1, 'a2'), (1, 'a3'), (2, 'b1')]]
+    await asyncio.sleep(0)
+
+    assert scheduler.running == 1
+    assert scheduler.queued == 3
+    assert scheduler.position(2) == 4
+    assert scheduler.position(3) == 3
+
+    gate.set()
+    await asyncio.gather(first, *tasks)
+
+    assert order == ['a1', 'a2', 'b1', 'a3']
+    assert scheduler.running == 0
+    assert scheduler.position(1) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = GradingScheduler(capacity=1)
+    async with scheduler.slot(1):
+        waiter = asyncio.create_task(scheduler.slot(2).__aenter__())
+        await asyncio.sleep(0)
+        assert scheduler.queued == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.queued == 0
+
+    assert scheduler.running == 0
+
+
+def test_setup_scheduler_splits_capacity_between_bot_workers(mocker):
+    mocker.patch.object(settings, 'GRADING_CONCURRENCY', 8)
+    mocker.patch.object(scheduler_module, 'scheduler', GradingScheduler(8))
+    # The grader never calls setup_scheduler and keeps the whole host.
+    assert get_scheduler().capacity == 8
+    setup_scheduler(3)
+    assert get_scheduler().capacity == 2
+    setup_scheduler(16)
+    assert get_scheduler().capacity == 1
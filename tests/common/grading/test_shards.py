@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from src.grading.runner import CaseResult
+from src.grading.shards import run_sharded, split
+
+
+def test_split_covers_every_test_once():
+    assert split(10, 3) == [range(0, 4), range(4, 8), range(8, 10)]
+    assert split(2, 4) == [range(0, 1), range(1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_run_sharded_reports_lowest_failure_and_cancels_later_shards():
+    tests = [(value,) for value in [1, 2, 3, -4, 5, -6, 7, 8, 9]]
+    started, cancelled = [], []
+
+    async def run(shard_tests: list[tuple]):
+        started.append(shard_tests[0][0])
+        try:
+            for index, (value,) in enumerate(shard_tests):
+                # The failure in the middle shard shows up before the first shard is done.
+                await asyncio.sleep(0.01 * abs(value))
+                yield CaseResult(index, str(value), '')
+        except asyncio.CancelledError:
+            cancelled.append(shard_tests[0][0])
+            raise
+
+    cases = [
+        case async for case in run_sharded(run, tests, shards=3, failed=lambda case: case.output.startswith('-'))
+    ]
+
+    assert [case.index for case in cases] == [0, 1, 2, 3]
+    assert cases[-1].output == '-4'
+    assert set(started) == {1, -4, 7}
+    # The last shard is dropped as soon as the failure is seen, the rest once the stream is done.
+    assert cancelled == [7, -4]
+
+
+@pytest.mark.asyncio
+async def test_run_sharded_reports_a_shard_that_died_as_crashed():
+    tests = [(value,) for value in range(6)]
+
+    async def run(shard_tests: list[tuple]):
+        for index, (value,) in enumerate(shard_tests):
+            if value == 3:
+                # The sandbox of the second shard went away without a word.
+                return
+            yield CaseResult(index, str(value), '')
+
+    cases = [case async for case in run_sharded(run, tests, shards=2, failed=lambda case: False)]
+
+    assert [case.output for case in cases[:3]] == ['0', '1', '2']
+    assert cases[-1].index == 3
+    assert cases[-1].transient
+    assert cases[-1].error
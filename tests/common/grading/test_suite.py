@@ -0,0 +1,44 @@
+from config.settings import settings
+from src.grading.suite import build_suite, task_data_version
+
+TASK = {
+    'id': '550e8400-e29b-41d4-a716-446655440111',
+    'complexity': 'hard',
+    'input_data': '[[1, 2], [2, 3]]',
+    'correct_answer': '[3, 5]',
+    'secret_input': '[[3, 5]]',
+    'secret_answer': '[8]',
+}
+
+
+def test_build_suite_decodes_tests_once():
+    suite = build_suite(TASK)
+
+    assert suite.task_id == TASK['id']
+    assert suite.tests == ((1, 2), (2, 3), (3, 5))
+    assert suite.expected == ('3', '5', '8')
+    assert suite.public_count == 2
+    assert suite.secret_start == 2
+    assert not suite.secret_missing
+
+
+def test_build_suite_without_secret_tests():
+    suite = build_suite({**TASK, 'secret_input': 'null'})
+
+    assert suite.tests == ((1, 2), (2, 3))
+    assert suite.secret_missing
+    assert build_suite({**TASK, 'input_data': 'null'}) is None
+
+
+def test_data_version_changes_with_tests():
+    assert task_data_version(TASK) == task_data_version(dict(TASK))
+    assert task_data_version(TASK) != task_data_version({**TASK, 'secret_answer': '[9]'})
+
+
+def test_build_suite_applies_task_limits():
+    suite = build_suite({**TASK, 'time_limit': 1.5, 'memory_limit_mb': 64})
+
+    assert suite.limits.time == 1.5
+    assert suite.limits.memory_mb == 64
+    assert build_suite(TASK).limits.time == settings.SANDBOX_TIMEOUT
+    assert task_data_version(TASK) != task_data_version({**TASK, 'time_limit': 1.5})
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from src.grading.runner import CaseResult, Limits, protocol_limit
+from src.grading.supervisor import run_in_supervisor, start_server
+
+
+class BusyPool:
+    def __init__(self, wait: float) -> None:
+        self.wait = wait
+
+    async def run(self, user_code, func_name, tests, limits, on_start=None):
+        # Every worker is taken, the job waits longer than the per-case time limit.
+        await asyncio.sleep(self.wait)
+        await on_start()
+        for index, (data,) in enumerate(tests):
+            yield CaseResult(index, str(len(data)), '')
+
+
+@pytest.mark.asyncio
+async def test_supervisor_queue_time_is_not_the_users_time(tmp_path):
+    path = str(tmp_path / 'supervisor.sock')
+    server = await start_server(BusyPool(wait=1.5), path)
+    # A job line far longer than the default 64 KiB readline limit.
+    tests = [('x' * 100_000,), ('y' * 200_000,)]
+    async with server:
+        reader, writer = await asyncio.open_unix_connection(path, limit=protocol_limit(64 * 1024))
+        job = run_in_supervisor(reader, writer, 'def f(a): ...', 'f', tests, Limits(time=0.1))
+        cases = [case async for case in job]
+
+    assert [(case.output, case.error) for case in cases] == [('100000', ''), ('200000', '')]
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from src.middlewares.outbound import BULK, INTERACTIVE, OutboundMiddleware, OutboundScheduler
+
+
+@pytest.mark.asyncio
+async def test_interactive_replies_go_first():
+    scheduler = OutboundScheduler(rate=100, chat_rate=100, chat_burst=10)
+    scheduler.bucket.tokens = 0
+    granted = []
+
+    async def acquire(chat_id: int, priority: int) -> None:
+        await scheduler.acquire(chat_id, priority)
+        granted.append(priority)
+
+    await asyncio.gather(*(acquire(chat_id, BULK) for chat_id in range(3)), acquire(10, INTERACTIVE))
+    assert granted == [INTERACTIVE, BULK, BULK, BULK]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured():
+    scheduler = OutboundScheduler(rate=100, chat_rate=100, chat_burst=10)
+    middleware = OutboundMiddleware(scheduler, max_retries=1)
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(asyncio.get_running_loop().time())
+        raise TelegramRetryAfter(method, 'Too Many Requests', retry_after=0.05)
+
+    with pytest.raises(TelegramRetryAfter):
+        await middleware(make_request, None, SendMessage(chat_id=1, text='Привет'))
+    # Retried once, after the pause Telegram asked for.
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.04
+
+    async def answer(bot, method):
+        return 'ok'
+
+    # Not addressed to a chat, not limited.
+    assert await middleware(answer, None, AnswerCallbackQuery(callback_query_id='1')) == 'ok'
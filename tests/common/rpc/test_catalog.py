@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from src.catalog import CatalogCache
+
+
+@pytest.mark.asyncio
+async def test_catalog_cache_reads_through_once():
+    cache = CatalogCache(ttl=60, local_size=8)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return [{'id': '1', 'title': 'Sum'}]
+
+    assert await cache.get('catalog:tasks:easy', load) == [{'id': '1', 'title': 'Sum'}]
+    assert await cache.get('catalog:tasks:easy', load) == [{'id': '1', 'title': 'Sum'}]
+    assert len(loads) == 1
+
+    await cache.invalidate('catalog:tasks:easy')
+    await cache.get('catalog:tasks:easy', load)
+    assert len(loads) == 2
+
+
+@pytest.mark.asyncio
+async def test_catalog_cache_does_not_store_data_loaded_before_invalidation():
+    cache = CatalogCache(ttl=60, local_size=8)
+    gate = asyncio.Event()
+
+    async def stale_load():
+        await gate.wait()
+        return ['stale']
+
+    pending = asyncio.create_task(cache.get('catalog:tasks:easy', stale_load))
+    await asyncio.sleep(0)
+    await cache.invalidate('catalog:tasks:easy')
+    gate.set()
+
+    assert await pending == ['stale']
+    assert cache.local.get('catalog:tasks:easy') is None
+
+
+@pytest.mark.asyncio
+async def test_catalog_cache_invalidates_all_pages_of_a_key():
+    cache = CatalogCache(ttl=60, local_size=8)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return {'items': [], 'has_next': False, 'has_prev': False}
+
+    for field in ('next:None', 'next:1', 'next:None'):
+        await cache.get('catalog:tasks:easy', load, field)
+    assert len(loads) == 2
+
+    await cache.invalidate('catalog:tasks:easy')
+    await cache.get('catalog:tasks:easy', load, 'next:1')
+    assert len(loads) == 3
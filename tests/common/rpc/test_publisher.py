@@ -0,0 +1,27 @@
+from collections import deque
+from unittest.mock import AsyncMock
+
+import pytest
+
+from db.storage import rabbit
+from db.storage.rabbit import Publisher
+from tests.mocking.rabbit import MockChannel, MockChannelPool, MockExchange, MockQueue
+
+
+@pytest.mark.asyncio
+async def test_publisher_declares_exchanges_once_per_channel(monkeypatch: pytest.MonkeyPatch):
+    channel = MockChannel(queue=MockQueue(deque()), exchange=MockExchange())
+    channel.declare_exchange = AsyncMock(return_value=channel.exchange)
+    monkeypatch.setattr(rabbit, 'channel_pool', MockChannelPool(channel=channel))
+    publisher = Publisher()
+
+    for _ in range(3):
+        await publisher.publish(b'message', routing_key='user_messages')
+    assert channel.declare_exchange.await_count == 1
+    assert channel.exchange.publish.await_count == 3
+
+    # A closed channel declares its exchanges again once it is reopened.
+    for callback in channel.close_callbacks:
+        callback(channel, None)
+    await publisher.publish(b'message', routing_key='user_messages')
+    assert channel.declare_exchange.await_count == 2
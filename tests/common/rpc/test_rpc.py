@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import msgpack
+import pytest
+
+from src.rpc import RpcClient
+
+
+@pytest.mark.asyncio
+async def test_rpc_client_pairs_replies_by_correlation_id():
+    client = RpcClient(timeout=1)
+    client.queue = SimpleNamespace(name='bot_replies.test')
+    published = []
+    client.exchange = AsyncMock()
+    client.exchange.publish.side_effect = lambda message, routing_key: published.append(message)
+
+    first = asyncio.create_task(client.call({'event': 'tasks', 'n': 1}))
+    second = asyncio.create_task(client.call({'event': 'tasks', 'n': 2}))
+    await asyncio.sleep(0)
+
+    assert all(message.reply_to == 'bot_replies.test' for message in published)
+    # Replies arrive out of order, a stale one is dropped.
+    await client.on_reply(SimpleNamespace(correlation_id='stale', body=msgpack.packb({'n': 0})))
+    for message in reversed(published):
+        await client.on_reply(SimpleNamespace(correlation_id=message.correlation_id, body=message.body))
+
+    assert (await first)['n'] == 1
+    assert (await second)['n'] == 2
+    assert not client.futures
+
+
+@pytest.mark.asyncio
+async def test_rpc_client_times_out():
+    client = RpcClient(timeout=0.01)
+    client.queue = SimpleNamespace(name='bot_replies.test')
+    client.exchange = AsyncMock()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.call({'event': 'tasks'})
+    assert not client.futures
+
+
+@pytest.mark.asyncio
+async def test_rpc_client_coalesces_identical_calls():
+    client = RpcClient(timeout=1)
+    client.queue = SimpleNamespace(name='bot_replies.test')
+    published = []
+    client.exchange = AsyncMock()
+    client.exchange.publish.side_effect = lambda message, routing_key: published.append(message)
+
+    calls = [asyncio.create_task(client.call({'event': 'tasks'}, coalesce_key='tasks')) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    assert len(published) == 1
+
+    await client.on_reply(SimpleNamespace(correlation_id=published[0].correlation_id, body=msgpack.packb({'n': 1})))
+    assert [(await call)['n'] for call in calls] == [1, 1, 1]
+    assert not client.coalescer.inflight
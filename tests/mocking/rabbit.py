@@ -1,11 +1,13 @@
 from collections import deque
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Iterator
 from unittest.mock import AsyncMock
 
 import aio_pika
 from aio_pika.exceptions import QueueEmpty
 
+REPLY_QUEUE = 'bot_replies.test'
+
 
 @dataclass
 class MockChannelPool:  # -> Channel
@@ -15,10 +17,11 @@ class MockChannelPool:  # -> Channel
         return self.channel
 
 
-@dataclass
+@dataclass(eq=False)
 class MockChannel:
     queue: 'MockQueue'
     exchange: 'MockExchange'
+    close_callbacks: set = field(default_factory=set)
 
     def __aenter__(self) -> 'MockChannel':
         return self
@@ -74,8 +77,8 @@ class MockQueue:
     def iterator(self) -> MockQueueIterator:
         return MockQueueIterator(queue=self.queue)
 
-    async def put(self, value: bytes, correlation_id) -> None:
-        self.queue.append(MockMessage(body=value, correlation_id=correlation_id))
+    async def put(self, value: bytes, correlation_id, reply_to: str | None = REPLY_QUEUE) -> None:
+        self.queue.append(MockMessage(body=value, correlation_id=correlation_id, reply_to=reply_to))
 
 
 class MockMessageProcess:
@@ -94,10 +97,20 @@ class MockMessageProcess:
 class MockMessage:
     body: bytes
     correlation_id: str
+    reply_to: str | None = None
+    headers: dict = field(default_factory=dict)
+
+    requeued: bool | None = None
 
     def process(self) -> MockMessageProcess:
         return MockMessageProcess()
 
+    async def ack(self) -> None:
+        self.requeued = False
+
+    async def reject(self, requeue: bool = False) -> None:
+        self.requeued = requeue
+
 
 class MockExchange(AsyncMock):
     pass